@@ -0,0 +1,341 @@
+"""Benchmarks for the environment lifecycle hot paths.
+
+Usage::
+
+    python benchmarks/bench.py run [-o results.json] [-k FILTER] [--repeat N] [--isolated]
+    python benchmarks/bench.py compare base.json new.json [--threshold 0.1]
+
+``run`` writes the results as JSON (to stdout, by default), and ``compare`` prints the
+relative change of the median time for each benchmark, exiting with a non-zero status if any
+of them regressed by more than the threshold.
+
+The benchmarks run offline. The build benchmarks use the current environment, instead of an
+isolated one, so they are skipped if ``flit_core`` (the backend of the example package) is
+not installed, unless ``--isolated`` is passed, which needs network access to install it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import contextlib
+import datetime
+import hashlib
+import importlib.util
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+
+from collections.abc import Callable, Iterator
+from typing import Any
+
+
+sys.path.insert(0, os.fspath(pathlib.Path(__file__).parent.parent))
+
+import environment_helpers
+import environment_helpers.build
+import environment_helpers.introspect
+
+
+EXAMPLE_PACKAGE = pathlib.Path(__file__).parent.parent / 'tests' / 'packages' / 'example'
+
+Benchmark = Callable[['Runner'], None]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(group: str) -> Callable[[Benchmark], Benchmark]:
+    def decorator(func: Benchmark) -> Benchmark:
+        BENCHMARKS[group] = func
+        return func
+
+    return decorator
+
+
+class Runner:
+    """Times benchmark cases, and collects the results."""
+
+    def __init__(self, workdir: pathlib.Path, repeat: int, pattern: str | None, isolated: bool):
+        self.workdir = workdir
+        self.repeat = repeat
+        self.pattern = pattern
+        self.isolated = isolated
+        self.results: dict[str, dict[str, Any]] = {}
+
+    def enabled(self, name: str) -> bool:
+        return self.pattern is None or self.pattern in name
+
+    def tempdir(self) -> pathlib.Path:
+        return pathlib.Path(tempfile.mkdtemp(dir=self.workdir))
+
+    def time(
+        self,
+        name: str,
+        func: Callable[[Any], object],
+        setup: Callable[[], Any] = lambda: None,
+        repeat: int | None = None,
+    ) -> None:
+        """Time ``func(setup())``, excluding the setup, ``repeat`` times."""
+        if not self.enabled(name):
+            return
+        times = []
+        for _ in range(repeat or self.repeat):
+            arg = setup()
+            start = time.perf_counter()
+            func(arg)
+            times.append(time.perf_counter() - start)
+        self.results[name] = {
+            'times': times,
+            'min': min(times),
+            'median': statistics.median(times),
+            'mean': statistics.mean(times),
+            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        }
+        print(f'{name}: {statistics.median(times) * 1000:.2f} ms', file=sys.stderr)  # noqa: T201
+
+
+def _record_hash(data: bytes) -> str:
+    digest = hashlib.sha256(data).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip('=')
+
+
+def make_wheel(directory: pathlib.Path, name: str, file_count: int) -> pathlib.Path:
+    """Create a pure wheel with ``file_count`` small modules."""
+    dist_info = f'{name}-1.0.0.dist-info'
+    contents = {f'{name}/module_{i}.py': f'value = {i}\n'.encode() for i in range(file_count - 1)}
+    contents[f'{name}/__init__.py'] = b''
+    contents[f'{dist_info}/METADATA'] = (
+        f'Metadata-Version: 2.1\nName: {name}\nVersion: 1.0.0\n'.encode()
+    )
+    contents[f'{dist_info}/WHEEL'] = (
+        b'Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n'
+    )
+    record = [f'{path},sha256={_record_hash(data)},{len(data)}' for path, data in contents.items()]
+    record.append(f'{dist_info}/RECORD,,')
+
+    wheel = directory / f'{name}-1.0.0-py3-none-any.whl'
+    with zipfile.ZipFile(wheel, 'w') as zf:
+        for path, data in contents.items():
+            zf.writestr(path, data)
+        zf.writestr(f'{dist_info}/RECORD', '\n'.join(record) + '\n')
+    return wheel
+
+
+@benchmark('create_venv')
+def bench_create_venv(runner: Runner) -> None:
+    for with_pip in (False, True):
+        suffix = 'with-pip' if with_pip else 'without-pip'
+        repeat = min(runner.repeat, 3) if with_pip else None
+        runner.time(
+            f'create_venv[{suffix}]',
+            lambda path, with_pip=with_pip: environment_helpers.create_venv(
+                path, with_pip=with_pip
+            ),
+            runner.tempdir,
+            repeat,
+        )
+        runner.time(
+            f'create_venv[{suffix},template]',
+            lambda path, with_pip=with_pip: environment_helpers.create_venv(
+                path, template=True, with_pip=with_pip
+            ),
+            runner.tempdir,
+        )
+    if runner.enabled('VirtualEnvironment[open]'):
+        existing = runner.tempdir()
+        environment_helpers.create_venv(existing)
+        runner.time(
+            'VirtualEnvironment[open]',
+            environment_helpers.VirtualEnvironment,
+            lambda: existing,
+            runner.repeat * 10,
+        )
+
+
+@benchmark('introspect')
+def bench_introspect(runner: Runner) -> None:
+    methods = {
+        'snapshot': lambda obj: obj.snapshot(),
+        'get_version': lambda obj: obj.get_version(),
+        'get_scheme': lambda obj: obj.get_scheme(),
+        'get_system_scheme': lambda obj: obj.get_system_scheme(),
+        'get_launcher_kind': lambda obj: obj.get_launcher_kind(),
+    }
+    warm = environment_helpers.introspect.Introspectable(sys.executable)
+    for name, method in methods.items():
+        runner.time(
+            f'introspect.{name}[cold]',
+            method,
+            lambda: environment_helpers.introspect.Introspectable(sys.executable),
+        )
+        method(warm)
+        runner.time(f'introspect.{name}[warm]', method, lambda: warm)
+
+    with environment_helpers.introspect.Introspectable(sys.executable, worker=True) as worker:
+        for name, method in methods.items():
+            worker.call('os.getpid')
+
+            def setup(worker: Any = worker) -> Any:
+                worker._cache.clear()
+                return worker
+
+            runner.time(f'introspect.{name}[worker]', method, setup)
+
+
+@benchmark('call')
+def bench_call(runner: Runner) -> None:
+    sizes = {'1KiB': 1024, '64KiB': 64 * 1024, '1MiB': 1024 * 1024, '16MiB': 16 * 1024 * 1024}
+    for size_name, size in sizes.items():
+        payload = os.urandom(size)
+        runner.time(
+            f'call[subprocess,{size_name}]',
+            lambda obj, payload=payload: obj.call('builtins.bytes', payload),
+            lambda: environment_helpers.introspect.Introspectable(sys.executable),
+        )
+        for transport in ('pipe', 'mmap'):
+            with environment_helpers.introspect.Introspectable(
+                sys.executable, worker=True, transport=transport
+            ) as obj:
+                obj.call('os.getpid')
+                runner.time(
+                    f'call[worker,{transport},{size_name}]',
+                    lambda obj, payload=payload: obj.call('builtins.bytes', payload),
+                    lambda obj=obj: obj,
+                )
+
+
+@benchmark('install_wheel')
+def bench_install_wheel(runner: Runner) -> None:
+    template = runner.tempdir()
+    environment_helpers.create_venv(template)
+    for file_count in (10, 100, 1_000, 10_000):
+        name = f'install_wheel[{file_count}]'
+        if not runner.enabled(name):
+            continue
+        wheel = make_wheel(runner.tempdir(), f'synthetic{file_count}', file_count)
+
+        def setup() -> environment_helpers.Environment:
+            path = runner.tempdir()
+            shutil.copytree(template, path, symlinks=True, dirs_exist_ok=True)
+            env = environment_helpers.VirtualEnvironment(path)
+            # Exclude the introspection from the installation time
+            env.introspectable.snapshot()
+            return env
+
+        runner.time(name, lambda env, wheel=wheel: env.install_wheel(wheel), setup)
+
+
+@benchmark('build')
+def bench_build(runner: Runner) -> None:
+    if not runner.isolated and importlib.util.find_spec('flit_core') is None:
+        print('skipping the build benchmarks, flit_core is not installed', file=sys.stderr)  # noqa: T201
+        return
+    functions = {
+        'build_wheel': environment_helpers.build.build_wheel,
+        'build_wheel_via_sdist': environment_helpers.build.build_wheel_via_sdist,
+    }
+    for name, function in functions.items():
+        runner.time(
+            f'{name}[example]',
+            lambda outdir, function=function: function(
+                EXAMPLE_PACKAGE, outdir, isolated=runner.isolated, quiet=True
+            ),
+            runner.tempdir,
+            min(runner.repeat, 5),
+        )
+
+
+def metadata() -> dict[str, Any]:
+    return {
+        'environment-helpers': environment_helpers.__version__,
+        'python': sys.version,
+        'implementation': sys.implementation.name,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+@contextlib.contextmanager
+def isolated_cache() -> Iterator[pathlib.Path]:
+    """Run with an empty cache directory, so the results don't depend on previous runs."""
+    with tempfile.TemporaryDirectory(prefix='environment-helpers-bench-') as workdir:
+        old = os.environ.get('ENVIRONMENT_HELPERS_CACHE_DIR')
+        os.environ['ENVIRONMENT_HELPERS_CACHE_DIR'] = os.path.join(workdir, 'cache')
+        try:
+            yield pathlib.Path(workdir)
+        finally:
+            if old is None:
+                del os.environ['ENVIRONMENT_HELPERS_CACHE_DIR']
+            else:
+                os.environ['ENVIRONMENT_HELPERS_CACHE_DIR'] = old
+
+
+def run(args: argparse.Namespace) -> int:
+    with isolated_cache() as workdir:
+        runner = Runner(workdir, args.repeat, args.filter, args.isolated)
+        for bench in BENCHMARKS.values():
+            bench(runner)
+    data = json.dumps({'metadata': metadata(), 'results': runner.results}, indent=2)
+    if args.output:
+        pathlib.Path(args.output).write_text(data + '\n')
+    else:
+        print(data)  # noqa: T201
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    base = json.loads(pathlib.Path(args.base).read_text())['results']
+    new = json.loads(pathlib.Path(args.new).read_text())['results']
+    regressions = []
+    for name in sorted(base.keys() & new.keys()):
+        change = new[name]['median'] / base[name]['median'] - 1
+        marker = ''
+        if change > args.threshold:
+            marker = '  REGRESSION'
+            regressions.append(name)
+        print(  # noqa: T201
+            f'{name:50} {base[name]["median"] * 1000:10.2f} ms -> '
+            f'{new[name]["median"] * 1000:10.2f} ms ({change:+.1%}){marker}'
+        )
+    for name in sorted(base.keys() ^ new.keys()):
+        print(f'{name:50} only in {args.base if name in base else args.new}')  # noqa: T201
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-o', '--output', help='file to write the JSON results to')
+    run_parser.add_argument('-k', '--filter', help='only run benchmarks containing this string')
+    run_parser.add_argument('--repeat', type=int, default=10, help='number of runs per case')
+    run_parser.add_argument(
+        '--isolated', action='store_true', help='use isolated build environments'
+    )
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='relative slowdown of the median reported as a regression (default: 0.1)',
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return int(args.func(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,26 +2,44 @@
 
 from __future__ import annotations
 
+import contextlib
+import importlib
 import os
 import pathlib
-import shutil
-import subprocess
 import sys
 import sysconfig
-import tempfile
-import venv
+import typing
 
-from collections.abc import Collection, Mapping
+from collections.abc import Collection, Iterator, Mapping
 from typing import Any, Literal, Protocol
 
-import environment_helpers.build
-import environment_helpers.install
-import environment_helpers.introspect
+
+if typing.TYPE_CHECKING:
+    import environment_helpers._utils
+    import environment_helpers.build
+    import environment_helpers.discovery
+    import environment_helpers.distributions
+    import environment_helpers.install
+    import environment_helpers.introspect
+    import environment_helpers.trace
 
 
 __version__ = '0.3.0'
 
 
+# Submodules, and the modules used only by some of the helpers (eg. subprocess, venv), are
+# imported on first use, to keep importing the package cheap.
+_SUBMODULES = frozenset(
+    {'_utils', 'aio', 'build', 'discovery', 'distributions', 'install', 'introspect', 'trace'}
+)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 class Environment(Protocol):
     """Object representing a Python environment."""
 
@@ -44,14 +62,39 @@ class Environment(Protocol):
 
     @property
     def introspectable(self) -> environment_helpers.introspect.Introspectable:
-        """Introspectable object for the environment."""
-        return environment_helpers.introspect.Introspectable(self.interpreter)
+        """Introspectable object for the environment, shared with other users of the interpreter."""
+        import environment_helpers.introspect
+
+        return environment_helpers.introspect.get_introspectable(self.interpreter)
+
+    def distributions(self) -> environment_helpers.distributions.DistributionIndex:
+        """Index of the installed distributions, shared with other users of the environment.
+
+        See :class:`environment_helpers.distributions.DistributionIndex`.
+        """
+        import environment_helpers.distributions
+
+        return environment_helpers.distributions.get_index(
+            [self.scheme['purelib'], self.scheme['platlib']]
+        )
 
     def run(self, *args: str | os.PathLike[str], **kwargs: Any) -> bytes:
+        import subprocess
+
+        import environment_helpers.trace
+
         default_kwargs = {
             'env': self.env,
         }
-        return subprocess.check_output(args, **default_kwargs | kwargs)  # type: ignore[operator, return-value]
+        command = [os.fspath(arg) for arg in args]
+        with environment_helpers.trace.span('subprocess', command=command) as span:
+            try:
+                output = subprocess.check_output(args, **default_kwargs | kwargs)  # type: ignore[operator]
+            except subprocess.CalledProcessError as e:
+                span['returncode'] = e.returncode
+                raise
+            span['returncode'] = 0
+        return typing.cast(bytes, output)
 
     def run_interpreter(self, *args: str | os.PathLike[str], **kwargs: Any) -> bytes:
         return self.run(os.fspath(self.interpreter), *args, **kwargs)
@@ -59,36 +102,105 @@ class Environment(Protocol):
     def run_script(self, name: str | os.PathLike[str], *args: str) -> bytes:
         return self.run(os.fspath(self.scripts / name), *args)
 
-    def install_wheel(self, path: str | os.PathLike[str], scheme: str | None = None) -> None:
+    def run_streaming(self, *args: str | os.PathLike[str], **kwargs: Any) -> Iterator[bytes]:
+        """Run a command, yielding its output line by line, or chunk by chunk.
+
+        The output isn't kept in memory, other than the bounded tail requested for errors.
+        See :func:`environment_helpers._utils.run_streaming` for the supported options.
+        """
+        import environment_helpers._utils
+
+        default_kwargs = {
+            'env': self.env,
+        }
+        return environment_helpers._utils.run_streaming(args, **default_kwargs | kwargs)
+
+    def run_interpreter_streaming(
+        self, *args: str | os.PathLike[str], **kwargs: Any
+    ) -> Iterator[bytes]:
+        return self.run_streaming(os.fspath(self.interpreter), *args, **kwargs)
+
+    def run_script_streaming(
+        self, name: str | os.PathLike[str], *args: str, **kwargs: Any
+    ) -> Iterator[bytes]:
+        return self.run_streaming(os.fspath(self.scripts / name), *args, **kwargs)
+
+    def install_wheel(
+        self,
+        path: str | os.PathLike[str],
+        scheme: str | None = None,
+        store: environment_helpers.install.WheelStore | None = None,
+        optimization_levels: Collection[int] = (),
+    ) -> None:
+        import environment_helpers.install
+
         path = pathlib.Path(path)
         if not path.is_file():
             raise ValueError(f"{os.fspath(path)} isn't a file")
-        environment_helpers.install.install_wheel(path, self.interpreter, scheme)
+        environment_helpers.install.install_wheel(
+            path, self.interpreter, scheme, store, optimization_levels
+        )
+
+    def install_wheels(
+        self,
+        paths: Collection[str | os.PathLike[str]],
+        scheme: str | None = None,
+        jobs: int | None = None,
+        store: environment_helpers.install.WheelStore | None = None,
+        optimization_levels: Collection[int] = (),
+    ) -> None:
+        """Install multiple wheels in parallel.
+
+        See :func:`environment_helpers.install.install_wheels`.
+        """
+        import environment_helpers.install
+
+        wheels = [pathlib.Path(path) for path in paths]
+        for path in wheels:
+            if not path.is_file():
+                raise ValueError(f"{os.fspath(path)} isn't a file")
+        environment_helpers.install.install_wheels(
+            wheels, self.interpreter, scheme, jobs, store, optimization_levels
+        )
 
     def install_from_path(
         self,
         path: str | os.PathLike[str],
         scheme: str | None = None,
         from_sdist: bool = True,
+        cache: environment_helpers.build.WheelCache | None = None,
     ) -> None:
+        """Build a project and install it.
+
+        :param cache: Cache of built wheels, to skip the build if the project didn't change
+                      (see :class:`environment_helpers.build.WheelCache`).
+        """
+        import environment_helpers.build
+        import environment_helpers.trace
+
         if not os.path.isdir(path):
             raise ValueError(f"{os.fspath(path)} isn't a directory")
+        import tempfile
+
         build_func = (
             environment_helpers.build.build_wheel_via_sdist
             if from_sdist
             else environment_helpers.build.build_wheel
         )
-        with tempfile.TemporaryDirectory(prefix='environment-helpers-') as workdir:
-            wheel = build_func(path, workdir)
+        with (
+            environment_helpers.trace.span(
+                'install.path', path=os.fspath(path), from_sdist=from_sdist
+            ),
+            tempfile.TemporaryDirectory(prefix='environment-helpers-') as workdir,
+        ):
+            wheel = build_func(path, workdir, cache=cache)
             self.install_wheel(wheel)
 
-    def install(
+    def _install_command(
         self,
-        requirements: Collection[str],
         method: Literal['pip', 'uv', 'pip-local'] | None = None,
-    ) -> None:
-        if not len(requirements):
-            return
+    ) -> list[str]:
+        import shutil
 
         if not method:
             if shutil.which('uv'):
@@ -106,8 +218,51 @@ class Environment(Protocol):
             cmd = [os.fspath(self.interpreter), '-m', 'pip', 'install']
         elif method == 'uv':
             cmd = ['uv', 'pip', 'install', '--python', os.fspath(self.interpreter)]
+        return cmd
+
+    def install(
+        self,
+        requirements: Collection[str],
+        method: Literal['pip', 'uv', 'pip-local'] | None = None,
+    ) -> None:
+        import environment_helpers.distributions
+        import environment_helpers.trace
+
+        if not len(requirements):
+            return
 
-        self.run(*cmd, *requirements)
+        with environment_helpers.trace.span(
+            'install.requirements', requirements=list(requirements), method=method
+        ) as span:
+            # Avoid running the installer (and its resolver) if there's nothing to do
+            if environment_helpers.distributions.environment_satisfies(self, requirements):
+                span['skipped'] = True
+                return
+            self.run(*self._install_command(method), *requirements)
+
+    def uninstall(self, names: Collection[str]) -> None:
+        """Uninstall distributions, removing the files listed in their ``RECORD`` files.
+
+        Distributions that aren't installed are ignored. Only files inside the environment
+        directory, and the scheme paths distributions install to, are removed, so the files of
+        the base installation of virtual environments (eg. ``stdlib``) are never touched. See
+        :func:`environment_helpers.distributions.uninstall`.
+
+        :param names: Names of the distributions to uninstall.
+        """
+        import environment_helpers.distributions
+        import environment_helpers.trace
+
+        scheme = self.scheme
+        roots = [self.base, *(scheme[key] for key in ('purelib', 'platlib', 'scripts', 'data'))]
+        with environment_helpers.trace.span('uninstall', distributions=list(names)) as span:
+            index = self.distributions()
+            removed = 0
+            for name in names:
+                distribution = index.get(name)
+                if distribution:
+                    removed += environment_helpers.distributions.uninstall(distribution, roots)
+            span['files'] = removed
 
 
 class CurrentEnvironment(Environment):
@@ -127,20 +282,46 @@ class CurrentEnvironment(Environment):
 
     @property
     def scheme(self) -> environment_helpers.introspect.SchemeDict[pathlib.Path]:
-        return environment_helpers.introspect._scheme_dict(sysconfig.get_paths())
+        # Not using introspect._scheme_dict, to avoid importing the introspection machinery.
+        paths = {key: pathlib.Path(value) for key, value in sysconfig.get_paths().items()}
+        return typing.cast('environment_helpers.introspect.SchemeDict[pathlib.Path]', paths)
 
 
 class VirtualEnvironment(Environment):
     """Object representing a virtual environment (using the ``venv`` scheme)."""
 
     def __init__(self, path: os.PathLike[str] | str) -> None:
+        import environment_helpers.introspect
+
         self._base = pathlib.Path(path)
         self._scheme = environment_helpers.introspect.get_virtual_environment_scheme(path)
         assert self.interpreter.is_file()
 
     @classmethod
-    def create_venv(cls, path: os.PathLike[str] | str, **kwargs: Any) -> Environment:
-        venv.create(path, **kwargs)
+    def create_venv(
+        cls, path: os.PathLike[str] | str, template: bool = False, **kwargs: Any
+    ) -> Environment:
+        """Create a virtual environment.
+
+        With ``template=True``, a template environment is created once per interpreter and
+        set of options, and new environments are created by cloning it, which is much faster,
+        especially when installing pip. Files are shared with the template, via copy-on-write
+        clones or hardlinks, where possible.
+
+        :param path: Path of the new virtual environment.
+        :param template: Whether to clone the environment from a template.
+        :param kwargs: Options passed to :func:`venv.create`.
+        """
+        import venv
+
+        import environment_helpers.trace
+
+        with environment_helpers.trace.span('venv.create', path=os.fspath(path), template=template):
+            template_path = _venv_template(**kwargs) if template else None
+            if template_path:
+                _clone_venv(template_path, path, **kwargs)
+            else:
+                venv.create(path, **kwargs)
         return cls(path)
 
     @property
@@ -160,6 +341,33 @@ class VirtualEnvironment(Environment):
     def scheme(self) -> environment_helpers.introspect.SchemeDict[pathlib.Path]:
         return self._scheme
 
+    @property
+    def config(self) -> environment_helpers.introspect.VirtualEnvironmentConfig:
+        """Configuration of the environment, from its ``pyvenv.cfg`` file."""
+        import environment_helpers.introspect
+
+        return environment_helpers.introspect.read_virtual_environment_config(self.base)
+
+    def snapshot(self) -> EnvironmentSnapshot:
+        """Save the state of the environment files, to later restore it with :meth:`restore`.
+
+        The files are saved as copy-on-write clones, or hardlinks, where possible, so
+        taking a snapshot is cheap. As they may be hardlinks, the environment files must not
+        be modified in place, which installers don't do, until the snapshot is closed.
+        """
+        return EnvironmentSnapshot(self.base)
+
+    def restore(self, snapshot: EnvironmentSnapshot) -> None:
+        """Restore the environment files to the state saved in a snapshot.
+
+        Only the files that changed since the snapshot was taken are removed, or restored,
+        so this is much faster than recreating the environment. The snapshot can be restored
+        multiple times.
+        """
+        if snapshot.base != self.base:
+            raise ValueError(f'The snapshot is for a different environment ({snapshot.base})')
+        snapshot.restore()
+
     @property
     def env(self) -> Mapping[str, str]:
         return os.environ | {  # type: ignore[no-any-return, operator]
@@ -168,4 +376,224 @@ class VirtualEnvironment(Environment):
         }
 
 
+_FileKey = tuple[int, int, int, int]
+
+
+def _scan_tree(
+    base: pathlib.Path,
+) -> tuple[dict[str, _FileKey], dict[str, str], set[str]]:
+    """Find the files, symlinks (and their targets), and directories in a directory."""
+    import stat
+
+    files: dict[str, _FileKey] = {}
+    links: dict[str, str] = {}
+    dirs: set[str] = set()
+    for root, dirnames, filenames in os.walk(base):
+        relroot = os.path.relpath(root, base)
+        for name in dirnames + filenames:
+            path = os.path.join(root, name)
+            relpath = os.path.normpath(os.path.join(relroot, name))
+            st = os.lstat(path)
+            if stat.S_ISLNK(st.st_mode):
+                links[relpath] = os.readlink(path)
+            elif stat.S_ISDIR(st.st_mode):
+                dirs.add(relpath)
+            else:
+                files[relpath] = (st.st_ino, st.st_size, st.st_mtime_ns, st.st_mode)
+    return files, links, dirs
+
+
+class EnvironmentSnapshot:
+    """Saved state of the files of an environment, see :meth:`VirtualEnvironment.snapshot`.
+
+    The saved files are kept in a directory next to the environment, so that they can be
+    cloned, or hardlinked, which is removed by :meth:`close`.
+    """
+
+    def __init__(self, base: pathlib.Path) -> None:
+        import tempfile
+
+        import environment_helpers._utils
+        import environment_helpers.trace
+
+        self.base = base
+        with environment_helpers.trace.span('venv.snapshot', path=os.fspath(base)):
+            self._files, self._links, self._dirs = _scan_tree(base)
+            self._path = pathlib.Path(
+                tempfile.mkdtemp(prefix=f'.{base.name}-snapshot-', dir=base.parent)
+            )
+            for relpath in sorted(self._dirs):
+                self._path.joinpath(relpath).mkdir()
+            for relpath in self._files:
+                environment_helpers._utils.clone_file(base / relpath, self._path / relpath)
+
+    def __enter__(self) -> EnvironmentSnapshot:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Remove the saved files."""
+        import shutil
+
+        shutil.rmtree(self._path, ignore_errors=True)
+
+    def _remove_changes(self) -> tuple[set[str], set[str]]:
+        """Remove the files that changed, returning the missing files and symlinks."""
+        import shutil
+
+        files, links, dirs = _scan_tree(self.base)
+        for relpath in sorted(dirs - self._dirs):
+            # Parent directories are sorted first, so this is a no-op for their contents
+            shutil.rmtree(self.base / relpath, ignore_errors=True)
+        changed_files = {path for path, key in files.items() if self._files.get(path) != key}
+        changed_links = {path for path, target in links.items() if self._links.get(path) != target}
+        for relpath in changed_files | changed_links:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.base / relpath)
+        return (
+            changed_files | (self._files.keys() - files.keys()),
+            changed_links | (self._links.keys() - links.keys()),
+        )
+
+    def restore(self) -> int:
+        """Restore the environment files, returning the number of restored files."""
+        import environment_helpers._utils
+        import environment_helpers.trace
+
+        with environment_helpers.trace.span('venv.restore', path=os.fspath(self.base)) as span:
+            files, links = self._remove_changes()
+            for relpath in sorted(self._dirs):
+                self.base.joinpath(relpath).mkdir(exist_ok=True)
+            restored = files & self._files.keys()
+            for relpath in restored:
+                saved = os.lstat(self._path / relpath)
+                if (saved.st_size, saved.st_mtime_ns) != self._files[relpath][1:3]:
+                    raise ValueError(
+                        f'{relpath} was modified in place, so the snapshot is no longer valid'
+                    )
+                environment_helpers._utils.clone_file(self._path / relpath, self.base / relpath)
+                st = os.lstat(self.base / relpath)
+                self._files[relpath] = (st.st_ino, st.st_size, st.st_mtime_ns, st.st_mode)
+            for relpath in links & self._links.keys():
+                os.symlink(self._links[relpath], self.base / relpath)
+            span['files'] = len(restored)
+        return len(restored)
+
+
+def _venv_template(**kwargs: Any) -> str | None:
+    """Get the path of a template virtual environment, creating it if needed.
+
+    Returns None if the environment can't be created by cloning a template.
+    """
+    import hashlib
+    import json
+    import tempfile
+    import venv
+
+    import environment_helpers._utils
+    import environment_helpers.introspect
+
+    if kwargs.get('upgrade'):
+        return None
+    options = {key: value for key, value in kwargs.items() if key not in ('clear', 'prompt')}
+    identity = environment_helpers.introspect._interpreter_identity(sys.executable)
+    data = {'interpreter': identity, 'options': options}
+    key = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:32]
+    templates = environment_helpers._utils.cache_dir() / 'venv-templates'
+    marker = templates / f'{key}.json'
+    try:
+        template = json.loads(marker.read_bytes())
+    except (OSError, ValueError):
+        pass
+    else:
+        if _is_venv(template['path']):
+            return template['path'] if template['cloneable'] else None
+        # The template directory was removed, create it again
+
+    templates.mkdir(parents=True, exist_ok=True)
+    _remove_stale_venv_templates(templates)
+    path = tempfile.mkdtemp(prefix=f'{key}-', dir=templates)
+    venv.create(path, **options)
+    # Scripts containing the template path are rewritten when cloning, but we can't do
+    # that with binary files (eg. launchers on Windows).
+    scripts = VirtualEnvironment(path).scripts
+    cloneable = not any(
+        os.fsencode(path) in data and b'\0' in data
+        for data in (file.read_bytes() for file in scripts.iterdir() if file.is_file())
+    )
+    environment_helpers._utils.atomic_write(
+        marker, json.dumps({'path': path, 'cloneable': cloneable, 'interpreter': identity}).encode()
+    )
+    return path if cloneable else None
+
+
+def _is_venv(path: os.PathLike[str] | str) -> bool:
+    """Check if a virtual environment exists, without introspecting it."""
+    import environment_helpers.introspect
+
+    scripts = environment_helpers.introspect.get_virtual_environment_scheme(path)['scripts']
+    return os.path.isfile(os.path.join(scripts, 'python.exe' if os.name == 'nt' else 'python'))
+
+
+def _remove_stale_venv_templates(templates: pathlib.Path) -> None:
+    """Remove the templates created by interpreters that were modified, or removed."""
+    import json
+    import shutil
+
+    import environment_helpers.introspect
+
+    for marker in templates.glob('*.json'):
+        try:
+            template = json.loads(marker.read_bytes())
+            identity = template['interpreter']
+            path = identity['path']
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+        try:
+            current = environment_helpers.introspect._interpreter_identity(path)
+        except OSError:
+            current = None
+        if current != identity:
+            marker.unlink(missing_ok=True)
+            shutil.rmtree(template['path'], ignore_errors=True)
+
+
+def _clone_venv(template: str, path: os.PathLike[str] | str, **kwargs: Any) -> None:
+    """Create a virtual environment by cloning a template."""
+    import shutil
+    import venv
+
+    import environment_helpers._utils
+
+    # Let venv create everything that depends on the environment path, then copy
+    # everything else (eg. pip) from the template.
+    builder = venv.EnvBuilder(**kwargs)
+    context = builder.ensure_directories(os.path.abspath(path))
+    builder.create_configuration(context)
+    builder.setup_python(context)
+    builder.setup_scripts(context)
+
+    scripts = os.path.realpath(VirtualEnvironment(template).scripts)
+    old, new = os.fsencode(template), os.fsencode(context.env_dir)
+    for root, dirs, files in os.walk(template):
+        target = pathlib.Path(context.env_dir, os.path.relpath(root, template))
+        for name in dirs + files:
+            source, destination = os.path.join(root, name), target / name
+            if os.path.lexists(destination):
+                continue
+            if os.path.islink(source):
+                os.symlink(os.readlink(source), destination)
+            elif name in dirs:
+                destination.mkdir()
+            elif os.path.realpath(root) == scripts and old in (
+                data := pathlib.Path(source).read_bytes()
+            ):
+                destination.write_bytes(data.replace(old, new))
+                shutil.copymode(source, destination)
+            else:
+                environment_helpers._utils.clone_file(source, destination)
+
+
 create_venv = VirtualEnvironment.create_venv
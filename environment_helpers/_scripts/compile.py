@@ -0,0 +1,50 @@
+import base64
+import concurrent.futures
+import hashlib
+import json
+import os
+import py_compile
+import sys
+
+
+# Below this, starting the worker processes costs more than it saves
+POOL_THRESHOLD = 32
+
+
+def compile_file(task):
+    path, dfile, levels = task
+    written = []
+    for level in levels:
+        try:
+            cfile = py_compile.compile(path, dfile=dfile, doraise=True, optimize=level)
+        except (py_compile.PyCompileError, OSError):
+            continue
+        with open(cfile, 'rb') as f:
+            data = f.read()
+        digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).decode().rstrip('=')
+        written.append([cfile, digest, len(data)])
+    return written
+
+
+def main():
+    request = json.load(sys.stdin)
+    tasks = [(path, dfile, request['levels']) for path, dfile in request['files']]
+    jobs = request['jobs'] or os.cpu_count() or 1
+
+    results = None
+    if jobs > 1 and len(tasks) >= POOL_THRESHOLD:
+        try:
+            with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+                chunksize = max(1, len(tasks) // (jobs * 4))
+                results = list(executor.map(compile_file, tasks, chunksize=chunksize))
+        except (NotImplementedError, OSError):
+            # Eg. no working multiprocessing semaphores on this platform
+            results = None
+    if results is None:
+        results = [compile_file(task) for task in tasks]
+
+    json.dump(results, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
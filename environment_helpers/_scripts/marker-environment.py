@@ -0,0 +1,30 @@
+import json
+import os
+import platform
+import sys
+
+
+# Same as packaging.markers.default_environment()
+def format_full_version(info):
+    version = f'{info.major}.{info.minor}.{info.micro}'
+    if info.releaselevel != 'final':
+        version += info.releaselevel[0] + str(info.serial)
+    return version
+
+
+json.dump(
+    obj={
+        'implementation_name': sys.implementation.name,
+        'implementation_version': format_full_version(sys.implementation.version),
+        'os_name': os.name,
+        'platform_machine': platform.machine(),
+        'platform_release': platform.release(),
+        'platform_system': platform.system(),
+        'platform_version': platform.version(),
+        'python_full_version': platform.python_version(),
+        'platform_python_implementation': platform.python_implementation(),
+        'python_version': '.'.join(platform.python_version_tuple()[:2]),
+        'sys_platform': sys.platform,
+    },
+    fp=sys.stdout,
+)
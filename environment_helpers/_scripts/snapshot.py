@@ -0,0 +1,38 @@
+import contextlib
+import io
+import json
+import os
+import runpy
+import sys
+
+
+scripts = os.path.dirname(os.path.abspath(__file__))
+
+
+def run(name, environ=None):
+    path = os.path.join(scripts, f'{name}.py')
+    saved_argv = sys.argv
+    saved_environ = os.environ.copy()
+    sys.argv = [path]
+    os.environ.update(environ or {})
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            runpy.run_path(path, run_name='__main__')
+    finally:
+        sys.argv = saved_argv
+        os.environ.clear()
+        os.environ.update(saved_environ)
+    return json.loads(stdout.getvalue())
+
+
+json.dump(
+    obj={
+        'version': run('version'),
+        'scheme': run('scheme'),
+        # Fedora automatically changes the default scheme unless RPM_BUILD_ROOT is set
+        'system_scheme': run('system-scheme', {'RPM_BUILD_ROOT': ''}),
+        'launcher_kind': run('launcher-kind'),
+        'marker_environment': run('marker-environment'),
+    },
+    fp=sys.stdout,
+)
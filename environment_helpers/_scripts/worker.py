@@ -0,0 +1,190 @@
+import errno
+import importlib
+import io
+import os
+import pickle
+import runpy
+import shutil
+import struct
+import sys
+import tempfile
+import traceback
+
+
+# Messages are pickled objects prefixed by their length, as an unsigned 64-bit big-endian integer.
+HEADER = struct.Struct('!Q')
+PROTOCOL = 4
+
+# With --mmap <dir>, large buffers are sent through memory-mapped files in that directory.
+# This needs to be kept in sync with _dump_message/_load_message in introspect.py.
+MMAP_THRESHOLD = 64 * 1024
+mmap_dir = None
+
+
+class BufferPickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        if type(obj) is memoryview or (type(obj) is bytes and len(obj) >= MMAP_THRESHOLD):
+            return type(obj), (pickle.PickleBuffer(obj),)
+        return NotImplemented
+
+
+def dump_message(obj):
+    if mmap_dir is None:
+        return pickle.dumps(obj, protocol=PROTOCOL)
+
+    buffers = []
+
+    def buffer_callback(buffer):
+        try:
+            raw = buffer.raw()
+        except BufferError:
+            return True
+        if raw.nbytes < MMAP_THRESHOLD:
+            return True
+        buffers.append(raw)
+        return False
+
+    data = io.BytesIO()
+    BufferPickler(data, protocol=5, buffer_callback=buffer_callback).dump(obj)
+    path = None
+    if buffers:
+        try:
+            path = write_buffers(buffers)
+        except OSError:
+            # Not enough space, so the buffers are sent through the pipe
+            data = io.BytesIO()
+            BufferPickler(data, protocol=5).dump(obj)
+            return pickle.dumps((None, [], data.getvalue()), protocol=5)
+    sizes = [buffer.nbytes for buffer in buffers]
+    return pickle.dumps((path, sizes, data.getvalue()), protocol=5)
+
+
+def write_buffers(buffers):
+    size = sum(buffer.nbytes for buffer in buffers)
+    if size > shutil.disk_usage(mmap_dir).free:
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC), mmap_dir)
+    fd, path = tempfile.mkstemp(dir=mmap_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for buffer in buffers:
+                f.write(buffer)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def load_message(data):
+    if mmap_dir is None:
+        return pickle.loads(data)
+
+    import mmap
+
+    path, sizes, payload = pickle.loads(data)
+    buffers = []
+    if path:
+        try:
+            with open(path, 'rb') as f:
+                if os.name == 'nt':
+                    view = memoryview(f.read())
+                else:
+                    view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        finally:
+            os.unlink(path)
+        offset = 0
+        for size in sizes:
+            buffers.append(view[offset : offset + size])
+            offset += size
+    return pickle.loads(payload, buffers=buffers)
+
+
+def read_message(stream):
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    (size,) = HEADER.unpack(header)
+    data = stream.read(size)
+    if len(data) < size:
+        return None
+    return load_message(data)
+
+
+def write_message(stream, obj):
+    data = dump_message(obj)
+    stream.write(HEADER.pack(len(data)))
+    stream.write(data)
+    stream.flush()
+
+
+def call(module, func_name, args, kwargs):
+    function = importlib.import_module(module)
+    for name in func_name.split('.'):
+        function = getattr(function, name)
+    return function(*args, **kwargs)
+
+
+def run_script(path, argv, environ):
+    saved_argv = sys.argv
+    saved_stdout = sys.stdout
+    saved_environ = os.environ.copy()
+    sys.argv = [path, *argv]
+    sys.stdout = io.StringIO()
+    os.environ.update(environ)
+    try:
+        runpy.run_path(path, run_name='__main__')
+        return sys.stdout.getvalue()
+    finally:
+        sys.argv = saved_argv
+        sys.stdout = saved_stdout
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+
+def handle(request):
+    kind, *params = request
+    if kind == 'call':
+        return call(*params)
+    elif kind == 'script':
+        return run_script(*params)
+    raise ValueError(f'Unknown request kind: {kind!r}')
+
+
+def reply_error(channel, exception):
+    tb = ''.join(traceback.format_exception(type(exception), exception, exception.__traceback__))
+    # Pickled separately, as the exception class may not be importable by the receiver
+    try:
+        data = pickle.dumps(exception, protocol=PROTOCOL)
+    except Exception:
+        data = None
+    write_message(channel, (False, data, tb))
+
+
+def main():
+    global mmap_dir
+    if sys.argv[1:2] == ['--mmap']:
+        mmap_dir = sys.argv[2]
+
+    # Keep private handles to the pipes, so that functions writing to stdout or reading from
+    # stdin can't corrupt the message stream.
+    requests = os.fdopen(os.dup(sys.stdin.fileno()), 'rb')
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    with open(os.devnull, 'rb') as devnull:
+        os.dup2(devnull.fileno(), sys.stdin.fileno())
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    while True:
+        request = read_message(requests)
+        if request is None:
+            break
+        try:
+            value = handle(request)
+        except Exception as e:
+            reply_error(channel, e)
+            continue
+        try:
+            write_message(channel, (True, value))
+        except Exception as e:
+            reply_error(channel, e)
+
+
+main()
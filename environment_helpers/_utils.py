@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import collections
+import functools
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import weakref
+
+from collections.abc import Callable, Hashable, Iterator, Sequence
+from typing import IO, Any, Generic, TypeVar
+
+import environment_helpers.trace
+
+
+_T = TypeVar('_T')
+
+
+def cache_dir() -> pathlib.Path:
+    """Directory for the persistent caches.
+
+    It can be overridden with the ``ENVIRONMENT_HELPERS_CACHE_DIR`` environment variable,
+    otherwise it is placed in the platform user cache directory (eg. ``XDG_CACHE_HOME``).
+    """
+    if 'ENVIRONMENT_HELPERS_CACHE_DIR' in os.environ:
+        return pathlib.Path(os.environ['ENVIRONMENT_HELPERS_CACHE_DIR'])
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~/AppData/Local')
+    elif 'XDG_CACHE_HOME' in os.environ:
+        base = os.environ['XDG_CACHE_HOME']
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.path.expanduser('~/.cache')
+    return pathlib.Path(base, 'environment-helpers')
+
+
+def atomic_write(path: os.PathLike[str] | str, data: bytes) -> None:
+    """Write a file, such that concurrent readers only ever see the old or the new contents."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class FileLock:
+    """Non-blocking inter-process lock, backed by a lock file.
+
+    The lock is released automatically if the owning process dies.
+    """
+
+    def __init__(self, path: os.PathLike[str] | str) -> None:
+        self._path = path
+        self._fd: int | None = None
+
+    def acquire(self) -> bool:
+        """Try to acquire the lock, returning whether it succeeded."""
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT)
+        try:
+            if sys.platform == 'win32':
+                import msvcrt
+
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        if sys.platform == 'win32':
+            import msvcrt
+
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+
+# ioctl request number for copy-on-write file clones on Linux
+_FICLONE = 0x40049409
+
+
+def clone_file(
+    src: os.PathLike[str] | str, dst: os.PathLike[str] | str, hardlink: bool = True
+) -> None:
+    """Copy a file, sharing its data with the source if possible.
+
+    This tries a copy-on-write clone (reflink), then a hardlink, and falls back to a regular
+    copy. The modification time is preserved, so bytecode caches stay valid. As the result
+    may be a hardlink, the destination must not be modified in place, unless ``hardlink`` is
+    false.
+    """
+    if sys.platform == 'linux':
+        import fcntl
+
+        with open(src, 'rb') as fsrc, open(dst, 'xb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                cloned = True
+            except OSError:
+                cloned = False
+        if cloned:
+            shutil.copystat(src, dst)
+            return
+        os.unlink(dst)
+    if hardlink:
+        try:
+            os.link(src, dst)
+        except OSError:
+            pass
+        else:
+            return
+    shutil.copy2(src, dst)
+
+
+class TailBuffer:
+    """Buffer keeping only the last ``max_size`` bytes written to it."""
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._chunks: collections.deque[bytes] = collections.deque()
+        self._size = 0
+        self.truncated = False
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        while self._chunks and self._size - len(self._chunks[0]) >= self._max_size:
+            self._size -= len(self._chunks.popleft())
+            self.truncated = True
+
+    def getvalue(self) -> bytes:
+        data = b''.join(self._chunks)
+        if len(data) > self._max_size:
+            self.truncated = True
+            return data[len(data) - self._max_size :]
+        return data
+
+
+class Registry(Generic[_T]):
+    """Thread-safe registry of shared objects.
+
+    The objects are only referenced weakly, except the ``recent_size`` most recently used
+    ones, which are kept alive even if they aren't referenced anywhere else.
+    """
+
+    def __init__(self, recent_size: int = 32) -> None:
+        self._objects: weakref.WeakValueDictionary[Hashable, _T] = weakref.WeakValueDictionary()
+        self._recent: collections.OrderedDict[Hashable, _T] = collections.OrderedDict()
+        self._recent_size = recent_size
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, factory: Callable[[], _T]) -> _T:
+        """Get the object for a key, creating it with ``factory`` if needed."""
+        with self._lock:
+            obj = self._objects.get(key)
+            if obj is None:
+                obj = self._objects[key] = factory()
+            self._recent[key] = obj
+            self._recent.move_to_end(key)
+            while len(self._recent) > self._recent_size:
+                self._recent.popitem(last=False)
+        return obj
+
+
+def run_streaming(
+    cmd: Sequence[str | os.PathLike[str]],
+    chunk_size: int | None = None,
+    tail: int | None = None,
+    stderr: int | Callable[[bytes], None] | None = None,
+    **kwargs: Any,
+) -> Iterator[bytes]:
+    """Run a command, yielding its output as it is produced.
+
+    If the command fails, :class:`subprocess.CalledProcessError` is raised once all the output
+    has been yielded. If the iteration is stopped early, the process is killed.
+
+    :param cmd: Command to run.
+    :param chunk_size: Yield chunks of up to this size, as soon as they are available, instead
+                       of lines.
+    :param tail: Keep the last ``tail`` bytes of the output (and the captured stderr) to set
+                 in the :class:`subprocess.CalledProcessError`.
+    :param stderr: What to do with stderr. None inherits it, and :data:`subprocess.STDOUT`
+                   merges it into the output. :data:`subprocess.PIPE` captures it for the
+                   :class:`subprocess.CalledProcessError`, bounded by ``tail``, if set. If a
+                   callable is given, it is called with each stderr line, from another thread.
+    """
+    stdout_tail = TailBuffer(tail) if tail is not None else None
+    stderr_tail = None
+    stderr_callback = stderr if callable(stderr) else None
+    stderr_target = None if callable(stderr) else stderr
+    if stderr_callback or stderr_target == subprocess.PIPE:
+        stderr_target = subprocess.PIPE
+        stderr_tail = TailBuffer(tail if tail is not None else sys.maxsize)
+
+    command = [os.fspath(arg) for arg in cmd]
+    with environment_helpers.trace._span('subprocess', {'command': command}, nest=False) as span:
+        process: subprocess.Popen[bytes] = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=stderr_target, **kwargs
+        )
+        assert process.stdout
+
+        stderr_reader = None
+        if process.stderr:
+            stderr_reader = threading.Thread(
+                target=_read_lines,
+                args=(process.stderr, stderr_tail, stderr_callback),
+                daemon=True,
+            )
+            stderr_reader.start()
+
+        completed = False
+        try:
+            if chunk_size is None:
+                chunks: Iterator[bytes] = iter(process.stdout)
+            else:
+                chunks = iter(functools.partial(process.stdout.read1, chunk_size), b'')  # type: ignore[attr-defined]
+            for chunk in chunks:
+                if stdout_tail:
+                    stdout_tail.write(chunk)
+                yield chunk
+            completed = True
+        finally:
+            if not completed:
+                process.kill()
+            process.stdout.close()
+            if stderr_reader:
+                stderr_reader.join()
+            returncode = span['returncode'] = process.wait()
+
+        if returncode:
+            raise subprocess.CalledProcessError(
+                returncode,
+                command,
+                output=stdout_tail.getvalue() if stdout_tail else None,
+                stderr=stderr_tail.getvalue() if stderr_tail else None,
+            )
+
+
+def _read_lines(
+    stream: IO[bytes], buffer: TailBuffer | None, callback: Callable[[bytes], None] | None
+) -> None:
+    with stream:
+        for line in stream:
+            if buffer:
+                buffer.write(line)
+            if callback:
+                callback(line)
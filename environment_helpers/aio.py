@@ -0,0 +1,389 @@
+"""Asyncio counterparts of the environment, introspection and build helpers.
+
+All subprocesses are started with :func:`asyncio.create_subprocess_exec`, so no thread is
+needed per operation. When an operation is cancelled, the processes it started are killed,
+along with their child processes on POSIX (they are started in a new session).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import pathlib
+import pickle
+import signal
+import subprocess
+import sys
+import tempfile
+import typing
+
+from collections.abc import Callable, Collection, Mapping
+from typing import Any, Literal, TypeVar
+
+import build
+
+import environment_helpers
+import environment_helpers.build
+import environment_helpers.distributions
+import environment_helpers.install
+import environment_helpers.introspect
+import environment_helpers.trace
+
+
+T = TypeVar('T')
+
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    with contextlib.suppress(ProcessLookupError):
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+
+
+async def _run(
+    cmd: Collection[str | os.PathLike[str]],
+    input: bytes | None = None,  # noqa: A002
+    stdout: int | None = subprocess.PIPE,
+    **kwargs: Any,
+) -> bytes:
+    """Run a command and return its output, like :func:`subprocess.check_output`.
+
+    If the task is cancelled, the process is killed before the cancellation propagates.
+    """
+    command = [os.fspath(arg) for arg in cmd]
+    with environment_helpers.trace.span('subprocess', command=command) as span:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=subprocess.PIPE if input is not None else None,
+            stdout=stdout,
+            start_new_session=os.name == 'posix',
+            **kwargs,
+        )
+        try:
+            output, _ = await process.communicate(input)
+        except BaseException:
+            _kill(process)
+            # Reap the process, even if we get cancelled again
+            span['returncode'] = await asyncio.shield(process.wait())
+            raise
+        span['returncode'] = process.returncode
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, command, output)
+    return output or b''
+
+
+class AsyncIntrospectable:
+    """Asyncio view of an :class:`~environment_helpers.introspect.Introspectable` object.
+
+    The introspection data is shared with the wrapped object, including its persistent cache,
+    so data collected by either of them is available to both. Queries always run in a new
+    interpreter process, even if the wrapped object uses a worker process.
+
+    :param introspectable: Introspectable object to wrap.
+    """
+
+    def __init__(self, introspectable: environment_helpers.introspect.Introspectable) -> None:
+        self._introspectable = introspectable
+
+    @property
+    def introspectable(self) -> environment_helpers.introspect.Introspectable:
+        return self._introspectable
+
+    async def _arun_script(
+        self, name: str, *args: str, environ: Mapping[str, str] | None = None
+    ) -> Any:
+        script = environment_helpers.introspect._SCRIPTS_PATH / f'{name}.py'
+        data = await _run(
+            [os.fspath(self._introspectable._interpreter), os.fspath(script), *args],
+            env=os.environ | dict(environ or {}),
+        )
+        return json.loads(data)
+
+    async def asnapshot(self) -> environment_helpers.introspect.IntrospectionSnapshot:
+        """Async version of :meth:`Introspectable.snapshot`."""
+        snapshot = self._introspectable._cached_snapshot()
+        if snapshot is None:
+            data = await self._arun_script('snapshot')
+            snapshot = self._introspectable._set_snapshot(data, store=True)
+        return snapshot
+
+    async def _acached(self, key: tuple[str | None, ...], compute: Callable[[], Any]) -> Any:
+        cache = self._introspectable._cache
+        if key not in cache:
+            if (
+                self._introspectable._persistent_cache
+                and key in environment_helpers.introspect._SNAPSHOT_KEYS
+            ):
+                await self.asnapshot()
+            else:
+                cache[key] = await compute()
+        return cache[key]
+
+    async def aget_version(self) -> environment_helpers.introspect.PythonVersion:
+        """Async version of :meth:`Introspectable.get_version`."""
+
+        async def compute() -> environment_helpers.introspect.PythonVersion:
+            return environment_helpers.introspect.PythonVersion(
+                **await self._arun_script('version')
+            )
+
+        return typing.cast(
+            environment_helpers.introspect.PythonVersion,
+            await self._acached(('version',), compute),
+        )
+
+    async def aget_scheme(
+        self, scheme: str | None = None
+    ) -> environment_helpers.introspect.SchemeDict[pathlib.Path]:
+        """Async version of :meth:`Introspectable.get_scheme`."""
+        args = [scheme] if scheme else []
+
+        async def compute() -> environment_helpers.introspect.SchemeDict[pathlib.Path]:
+            return environment_helpers.introspect._scheme_dict(
+                await self._arun_script('scheme', *args)
+            )
+
+        return typing.cast(
+            environment_helpers.introspect.SchemeDict[pathlib.Path],
+            await self._acached(('scheme', scheme), compute),
+        )
+
+    async def aget_system_scheme(self) -> environment_helpers.introspect.SchemeDict[pathlib.Path]:
+        """Async version of :meth:`Introspectable.get_system_scheme`."""
+
+        async def compute() -> environment_helpers.introspect.SchemeDict[pathlib.Path]:
+            return environment_helpers.introspect._scheme_dict(
+                await self._arun_script('system-scheme', environ={'RPM_BUILD_ROOT': ''})
+            )
+
+        return typing.cast(
+            environment_helpers.introspect.SchemeDict[pathlib.Path],
+            await self._acached(('system-scheme',), compute),
+        )
+
+    async def aget_launcher_kind(self) -> environment_helpers.introspect.LauncherKind | None:
+        """Async version of :meth:`Introspectable.get_launcher_kind`."""
+
+        async def compute() -> environment_helpers.introspect.LauncherKind | None:
+            return typing.cast(
+                environment_helpers.introspect.LauncherKind | None,
+                await self._arun_script('launcher-kind'),
+            )
+
+        return typing.cast(
+            environment_helpers.introspect.LauncherKind | None,
+            await self._acached(('launcher-kind',), compute),
+        )
+
+    async def aget_marker_environment(self) -> dict[str, str]:
+        """Async version of :meth:`Introspectable.get_marker_environment`."""
+
+        async def compute() -> dict[str, str]:
+            return typing.cast(dict[str, str], await self._arun_script('marker-environment'))
+
+        return typing.cast(dict[str, str], await self._acached(('marker-environment',), compute))
+
+    async def acall(self, func: str | Callable[[Any], T], *args: Any, **kwargs: Any) -> T:
+        """Async version of :meth:`Introspectable.call`."""
+        module, func_name = environment_helpers.introspect._function_name(func)
+        script = environment_helpers.introspect._SCRIPTS_PATH / 'call.py'
+        data = await _run(
+            [os.fspath(self._introspectable._interpreter), os.fspath(script), module, func_name],
+            input=pickle.dumps({'args': args, 'kwargs': kwargs}),
+        )
+        return typing.cast(T, pickle.loads(data))
+
+
+class _MarkerEnvironmentNeeded(Exception):
+    pass
+
+
+def _marker_environment_needed() -> dict[str, str]:
+    # The marker environment needs to be fetched asynchronously, see AsyncEnvironment.ainstall
+    raise _MarkerEnvironmentNeeded
+
+
+class AsyncEnvironment:
+    """Asyncio view of an :class:`~environment_helpers.Environment` object.
+
+    :param environment: Environment to wrap.
+    """
+
+    def __init__(self, environment: environment_helpers.Environment) -> None:
+        self._environment = environment
+
+    @property
+    def environment(self) -> environment_helpers.Environment:
+        return self._environment
+
+    @property
+    def introspectable(self) -> AsyncIntrospectable:
+        return AsyncIntrospectable(self._environment.introspectable)
+
+    async def arun(self, *args: str | os.PathLike[str], **kwargs: Any) -> bytes:
+        """Async version of :meth:`Environment.run`."""
+        default_kwargs = {
+            'env': self._environment.env,
+        }
+        return await _run(args, **default_kwargs | kwargs)
+
+    async def arun_interpreter(self, *args: str | os.PathLike[str], **kwargs: Any) -> bytes:
+        return await self.arun(os.fspath(self._environment.interpreter), *args, **kwargs)
+
+    async def arun_script(self, name: str | os.PathLike[str], *args: str) -> bytes:
+        return await self.arun(os.fspath(self._environment.scripts / name), *args)
+
+    async def ainstall(
+        self,
+        requirements: Collection[str],
+        method: Literal['pip', 'uv', 'pip-local'] | None = None,
+    ) -> None:
+        """Async version of :meth:`Environment.install`."""
+        if not len(requirements):
+            return
+
+        # Like Environment.install, the marker environment is only fetched if needed
+        versions = self._environment.distributions().versions()
+        try:
+            satisfied = environment_helpers.distributions.requirements_satisfied(
+                requirements, versions, _marker_environment_needed
+            )
+        except _MarkerEnvironmentNeeded:
+            marker_environment = await self.introspectable.aget_marker_environment()
+            satisfied = environment_helpers.distributions.requirements_satisfied(
+                requirements, versions, lambda: marker_environment
+            )
+        if satisfied:
+            return
+
+        await self.arun(*self._environment._install_command(method), *requirements)
+
+    async def _aintrospect_install(self, scheme: str | None) -> None:
+        # Collect the introspection data asynchronously, so that the synchronous install code,
+        # which shares it, doesn't need to run the interpreter
+        introspectable = AsyncIntrospectable(
+            environment_helpers.introspect.get_introspectable(self._environment.interpreter)
+        )
+        await introspectable.asnapshot()
+        if scheme:
+            await introspectable.aget_scheme(scheme)
+
+    async def ainstall_wheel(
+        self,
+        path: str | os.PathLike[str],
+        scheme: str | None = None,
+        store: environment_helpers.install.WheelStore | None = None,
+        optimization_levels: Collection[int] = (),
+    ) -> None:
+        """Async version of :meth:`Environment.install_wheel`.
+
+        The wheel files are written from a worker thread, as there is no asynchronous file I/O.
+        """
+        await self._aintrospect_install(scheme)
+        await asyncio.to_thread(
+            self._environment.install_wheel, path, scheme, store, optimization_levels
+        )
+
+    async def ainstall_wheels(
+        self,
+        paths: Collection[str | os.PathLike[str]],
+        scheme: str | None = None,
+        jobs: int | None = None,
+        store: environment_helpers.install.WheelStore | None = None,
+        optimization_levels: Collection[int] = (),
+    ) -> None:
+        """Async version of :meth:`Environment.install_wheels`.
+
+        The wheel files are written from worker threads, as there is no asynchronous file I/O.
+        """
+        await self._aintrospect_install(scheme)
+        await asyncio.to_thread(
+            self._environment.install_wheels, paths, scheme, jobs, store, optimization_levels
+        )
+
+
+# Runs a function from environment_helpers.build, and writes its pickled result to a file,
+# as stdout may be used by the build output.
+_BUILD_CODE = """
+import pickle, sys
+sys.path.insert(0, sys.argv[1])
+import environment_helpers.build
+name, args, kwargs = pickle.load(sys.stdin.buffer)
+try:
+    result = (True, getattr(environment_helpers.build, name)(*args, **kwargs))
+except Exception as e:
+    result = (False, environment_helpers.build._portable_exception(e))
+with open(sys.argv[2], 'wb') as f:
+    pickle.dump(result, f)
+"""
+
+
+async def _run_build(name: str, *args: Any, **kwargs: Any) -> pathlib.Path:
+    """Run a build function in a subprocess, so that it can be killed if cancelled."""
+    package_parent = pathlib.Path(environment_helpers.__file__).parent.parent
+    with tempfile.TemporaryDirectory(prefix='environment-helpers-') as workdir:
+        result_path = os.path.join(workdir, 'result')
+        await _run(
+            [sys.executable, '-c', _BUILD_CODE, os.fspath(package_parent), result_path],
+            input=pickle.dumps((name, args, kwargs)),
+            stdout=None,
+        )
+        with open(result_path, 'rb') as f:
+            ok, value = pickle.load(f)
+    if not ok:
+        raise value
+    return typing.cast(pathlib.Path, value)
+
+
+async def abuild_sdist(
+    srcdir: os.PathLike[str] | str,
+    outdir: os.PathLike[str] | str,
+    config_settings: build.ConfigSettingsType | None = None,
+    isolated: bool = True,
+    quiet: bool = False,
+    pool: environment_helpers.build.BuildEnvironmentPool | None = None,
+) -> pathlib.Path:
+    """Async version of :func:`environment_helpers.build.build_sdist`."""
+    return await _run_build('build_sdist', srcdir, outdir, config_settings, isolated, quiet, pool)
+
+
+async def abuild_wheel(
+    srcdir: os.PathLike[str] | str,
+    outdir: os.PathLike[str] | str,
+    config_settings: build.ConfigSettingsType | None = None,
+    isolated: bool = True,
+    quiet: bool = False,
+    pool: environment_helpers.build.BuildEnvironmentPool | None = None,
+    cache: environment_helpers.build.WheelCache | None = None,
+) -> pathlib.Path:
+    """Async version of :func:`environment_helpers.build.build_wheel`."""
+    return await _run_build(
+        'build_wheel', srcdir, outdir, config_settings, isolated, quiet, pool, cache
+    )
+
+
+async def abuild_wheel_via_sdist(
+    srcdir: os.PathLike[str] | str,
+    outdir: os.PathLike[str] | str,
+    config_settings: build.ConfigSettingsType | None = None,
+    isolated: bool = True,
+    quiet: bool = False,
+    pool: environment_helpers.build.BuildEnvironmentPool | None = None,
+    keep_sdist: bool = True,
+    cache: environment_helpers.build.WheelCache | None = None,
+) -> pathlib.Path:
+    """Async version of :func:`environment_helpers.build.build_wheel_via_sdist`."""
+    return await _run_build(
+        'build_wheel_via_sdist',
+        srcdir,
+        outdir,
+        config_settings,
+        isolated,
+        quiet,
+        pool,
+        keep_sdist,
+        cache,
+    )
@@ -1,44 +1,513 @@
 from __future__ import annotations
 
+import collections
+import concurrent.futures
 import contextlib
+import functools
+import hashlib
+import io
+import json
+import multiprocessing
 import os
 import pathlib
+import pickle
+import shutil
+import stat
 import subprocess
+import sys
+import sysconfig
 import tarfile
 import tempfile
+import threading
+import time
+import uuid
 
-from collections.abc import Iterable, Mapping, Sequence
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, Sequence
+from typing import Any, NamedTuple
 
 import build
+import packaging.requirements
+import packaging.tags
+import packaging.utils
 
 import environment_helpers
+import environment_helpers._utils
+import environment_helpers.distributions
+import environment_helpers.introspect
+import environment_helpers.trace
 
 
-@contextlib.contextmanager  # type: ignore[arg-type]
-def _build_env(isolated: bool = True) -> Iterable[environment_helpers.Environment]:
-    if isolated:
-        with tempfile.TemporaryDirectory(prefix='environment-helpers-env-') as envdir:
-            yield environment_helpers.create_venv(envdir)
-    else:
-        yield environment_helpers.CurrentEnvironment()
+# Limits the number of build environments being created simultaneously, see build_many()
+_env_creation_limit: Any = None
+
+
+def _limit_env_creation() -> contextlib.AbstractContextManager[Any]:
+    return _env_creation_limit or contextlib.nullcontext()
+
+
+def _normalize_requirement(requirement: str) -> str:
+    try:
+        parsed = packaging.requirements.Requirement(requirement)
+    except packaging.requirements.InvalidRequirement:
+        return requirement.strip()
+    parsed.name = packaging.utils.canonicalize_name(parsed.name)
+    return str(parsed)
+
+
+def _disk_usage(path: os.PathLike[str] | str) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            size += os.lstat(os.path.join(root, name)).st_size
+    return size
+
+
+class BuildEnvironmentPool:
+    """Pool of isolated build environments, reused between builds with the same requirements.
+
+    Environments are keyed by the normalized set of build requirements and the interpreter.
+    Each environment is leased to one build at a time, even across processes sharing the same
+    pool directory, and checked for integrity before being reused. When the pool grows past
+    its limits, the least recently used environments are removed.
+
+    :param path: Directory to keep the environments in. If None, a temporary directory is
+                 used, which is removed by :meth:`close`.
+    :param max_environments: Maximum number of environments to keep.
+    :param max_size: Maximum total disk size of the environments to keep, in bytes.
+    """
+
+    def __init__(
+        self,
+        path: os.PathLike[str] | str | None = None,
+        max_environments: int = 8,
+        max_size: int | None = None,
+    ) -> None:
+        self._temporary = path is None
+        self._path = pathlib.Path(
+            tempfile.mkdtemp(prefix='environment-helpers-pool-') if path is None else path
+        )
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._max_environments = max_environments
+        self._max_size = max_size
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Copies (eg. in build_many() worker processes) never own the pool directory
+        state = self.__dict__.copy()
+        state['_temporary'] = False
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> BuildEnvironmentPool:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Remove the pool directory, if it is temporary."""
+        if self._temporary:
+            shutil.rmtree(self._path, ignore_errors=True)
+
+    def _key(self, requirements: Collection[str]) -> str:
+        identity = environment_helpers.introspect._interpreter_identity(sys.executable)
+        data = {
+            'interpreter': identity,
+            'requirements': sorted({_normalize_requirement(req) for req in requirements}),
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:32]
+
+    def _is_valid(self, name: str) -> bool:
+        try:
+            env = environment_helpers.VirtualEnvironment(self._path / name)
+            home = env.config.home
+            metadata = json.loads(self._path.joinpath(f'{name}.json').read_bytes())
+        except (OSError, ValueError, AssertionError):
+            return False
+        return (
+            env.interpreter.exists()
+            and (home is None or home.is_dir())
+            and env.distributions().versions() == metadata.get('distributions')
+        )
+
+    @staticmethod
+    def _reset(env: environment_helpers.Environment, versions: Mapping[str, str]) -> bool:
+        """Uninstall the distributions installed during a lease (eg. by the build backend).
+
+        :returns: Whether the environment is back to its original state.
+        """
+        current = env.distributions().versions()
+        if added := current.keys() - versions.keys():
+            env.uninstall(added)
+            current = env.distributions().versions()
+        return current == versions
+
+    def _remove(self, name: str, lock: environment_helpers._utils.FileLock) -> None:
+        self._path.joinpath(f'{name}.json').unlink(missing_ok=True)
+        shutil.rmtree(self._path / name, ignore_errors=True)
+        lock.release()
+        with contextlib.suppress(OSError):
+            self._path.joinpath(f'{name}.lock').unlink()
+
+    def _acquire(self, key: str) -> tuple[str, environment_helpers._utils.FileLock, bool]:
+        with self._lock:
+            for marker in self._path.glob(f'{key}-*.json'):
+                name = marker.stem
+                lock = environment_helpers._utils.FileLock(self._path / f'{name}.lock')
+                if not lock.acquire():
+                    continue
+                if self._is_valid(name):
+                    return name, lock, True
+                self._remove(name, lock)
+            name = f'{key}-{uuid.uuid4().hex[:8]}'
+            lock = environment_helpers._utils.FileLock(self._path / f'{name}.lock')
+            lock.acquire()
+            return name, lock, False
+
+    def _evict(self) -> None:
+        entries = []
+        for marker in self._path.glob('*.json'):
+            try:
+                entries.append((json.loads(marker.read_bytes()), marker.stem))
+            except (OSError, ValueError):
+                continue
+        entries.sort(key=lambda entry: entry[0].get('last-used', 0))
+        count = len(entries)
+        size = sum(metadata.get('size', 0) for metadata, _ in entries)
+        for metadata, name in entries:
+            if count <= self._max_environments and (
+                self._max_size is None or size <= self._max_size
+            ):
+                break
+            lock = environment_helpers._utils.FileLock(self._path / f'{name}.lock')
+            if not lock.acquire():
+                continue
+            self._remove(name, lock)
+            count -= 1
+            size -= metadata.get('size', 0)
+
+    @contextlib.contextmanager
+    def lease(self, requirements: Collection[str]) -> Iterator[environment_helpers.Environment]:
+        """Lease an environment with the requirements installed, for exclusive use.
+
+        Distributions installed in the environment while it is leased (eg. the dynamic build
+        requirements of a project) are removed when the lease ends. If the environment was
+        modified otherwise (eg. a distribution was upgraded), it is discarded.
+
+        :param requirements: Requirements to install in the environment.
+        """
+        name, lock, populated = self._acquire(self._key(requirements))
+        envdir = self._path / name
+        versions: dict[str, str] | None = None
+        try:
+            env: environment_helpers.Environment
+            if populated:
+                env = environment_helpers.VirtualEnvironment(envdir)
+            else:
+                with _limit_env_creation():
+                    env = environment_helpers.create_venv(envdir)
+                    env.install(requirements)
+            versions = env.distributions().versions()
+            yield env
+        finally:
+            try:
+                # Failed builds don't affect the environment, so we only need to discard it if
+                # it wasn't populated successfully, or if it couldn't be reset.
+                if versions is not None and self._reset(env, versions):
+                    metadata = {
+                        'requirements': sorted(requirements),
+                        'distributions': versions,
+                        'last-used': time.time(),
+                        'size': _disk_usage(envdir),
+                    }
+                    environment_helpers._utils.atomic_write(
+                        self._path / f'{name}.json', json.dumps(metadata).encode()
+                    )
+                else:
+                    self._remove(name, lock)
+            except BaseException:
+                # The environment may be partially reset, so it can't be reused
+                self._remove(name, lock)
+                raise
+            finally:
+                lock.release()
+                self._evict()
+
+
+# Directories skipped when fingerprinting source trees that aren't in a git repository, at any
+# level, or only at the top level of the tree
+_FINGERPRINT_EXCLUDE = frozenset({'.git', '.hg', '.svn', '.nox', '.tox', '.venv', '__pycache__'})
+_FINGERPRINT_EXCLUDE_TOP = frozenset({'build', 'dist'})
+
+
+def _git_files(srcdir: str) -> list[str] | None:
+    """List the files not ignored by git.
+
+    Returns None if the directory isn't in a git repository, or if git doesn't list any files
+    in it (eg. it is ignored).
+    """
+    try:
+        output = subprocess.run(
+            ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            cwd=srcdir,
+            capture_output=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return sorted({os.fsdecode(path) for path in output.split(b'\0') if path}) or None
+
+
+def _walk_files(srcdir: str) -> list[str]:
+    files: list[str] = []
+    for root, dirs, names in os.walk(srcdir):
+        dirs[:] = [
+            name
+            for name in dirs
+            if name not in _FINGERPRINT_EXCLUDE
+            and not name.endswith('.egg-info')
+            and not (root == srcdir and name in _FINGERPRINT_EXCLUDE_TOP)
+        ]
+        relroot = os.path.relpath(root, srcdir)
+        files.extend(os.path.normpath(os.path.join(relroot, name)) for name in names)
+    return sorted(files)
+
+
+def _file_digest(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def source_fingerprint(srcdir: os.PathLike[str] | str, hash_contents: bool = False) -> str:
+    """Fingerprint of the files of a source tree.
+
+    By default, it covers the path, size, mode and modification time of each file, so it is
+    cheap to compute, but changes when files are touched. With ``hash_contents``, the contents
+    of the files are hashed instead of relying on their size and modification time.
+
+    If the tree is in a git repository, and not ignored by it, the files ignored by git are
+    skipped, otherwise VCS metadata, caches, and the ``build`` and ``dist`` directories are.
+
+    :param srcdir: Source directory.
+    :param hash_contents: Whether to hash the contents of the files.
+    """
+    srcdir = os.path.abspath(srcdir)
+    files = _git_files(srcdir)
+    if files is None:
+        files = _walk_files(srcdir)
+    digest = hashlib.sha256()
+    for name in files:
+        path = os.path.join(srcdir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Eg. a file deleted from the working tree, but still in the git index
+            continue
+        digest.update(name.encode('utf-8', 'surrogateescape') + b'\0')
+        if hash_contents and stat.S_ISREG(st.st_mode):
+            digest.update(f'{st.st_mode}\0'.encode() + _file_digest(path))
+        else:
+            digest.update(f'{st.st_mode}\0{st.st_size}\0{st.st_mtime_ns}\0'.encode())
+    return digest.hexdigest()
+
+
+@functools.cache
+def _interpreter_tag() -> str:
+    return str(next(packaging.tags.sys_tags()))
+
+
+class WheelCache:
+    """Cache of built wheels, keyed by a fingerprint of the project source tree.
+
+    The key covers the files of the source tree (see :func:`source_fingerprint`), the config
+    settings, the build system requirements, and the tag of the interpreter the wheel is built
+    with, so cached wheels are only reused if none of them changed. For non-isolated builds,
+    it also covers the distributions installed in the current environment.
+
+    Entries are written atomically, so the cache can be shared by multiple processes.
+
+    :param path: Directory to keep the wheels in. If None, the ``built-wheels`` directory of the
+                 persistent cache is used.
+    :param hash_contents: Whether to hash the contents of the source files, instead of relying
+                          on their size and modification time.
+    :param max_entries: Maximum number of wheels to keep. When the cache grows past it, the
+                        least recently used wheels are removed.
+    """
+
+    def __init__(
+        self,
+        path: os.PathLike[str] | str | None = None,
+        hash_contents: bool = False,
+        max_entries: int = 256,
+    ) -> None:
+        self._path = pathlib.Path(
+            environment_helpers._utils.cache_dir() / 'built-wheels' if path is None else path
+        )
+        self._hash_contents = hash_contents
+        self._max_entries = max_entries
+
+    def key(
+        self,
+        srcdir: os.PathLike[str] | str,
+        config_settings: build.ConfigSettingsType | None = None,
+        isolated: bool = True,
+        via_sdist: bool = False,
+    ) -> str:
+        """Get the cache key for building a wheel of the project in ``srcdir``."""
+        requirements = build.ProjectBuilder(srcdir).build_system_requires
+        data: dict[str, Any] = {
+            'source': source_fingerprint(srcdir, self._hash_contents),
+            'config-settings': config_settings or {},
+            'requirements': sorted({_normalize_requirement(req) for req in requirements}),
+            'tag': _interpreter_tag(),
+            'isolated': isolated,
+            'via-sdist': via_sdist,
+        }
+        if not isolated:
+            paths = sysconfig.get_paths()
+            data['installed'] = environment_helpers.distributions.installed_versions(
+                [paths['purelib'], paths['platlib']]
+            )
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:32]
+
+    def get(self, key: str, outdir: os.PathLike[str] | str) -> pathlib.Path | None:
+        """Copy the wheel cached for ``key`` to ``outdir``, if any, and return its path."""
+        with environment_helpers.trace.span('build.cache', key=key) as span:
+            span['hit'] = False
+            entry = self._path / key
+            try:
+                names = [name for name in os.listdir(entry) if name.endswith('.whl')]
+            except OSError:
+                return None
+            if not names:
+                return None
+            wheel = pathlib.Path(outdir, names[0])
+            wheel.parent.mkdir(parents=True, exist_ok=True)
+            wheel.unlink(missing_ok=True)
+            try:
+                # The output may be overwritten in place by later builds, so never hardlink it
+                environment_helpers._utils.clone_file(entry / names[0], wheel, hardlink=False)
+                os.utime(entry)
+            except OSError:
+                # Removed by another process
+                return None
+            span['hit'] = True
+            return wheel
+
+    def put(self, key: str, wheel: os.PathLike[str] | str) -> None:
+        """Store a wheel built for ``key``."""
+        wheel = pathlib.Path(wheel)
+        self._path.mkdir(parents=True, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=self._path)
+        try:
+            environment_helpers._utils.clone_file(wheel, os.path.join(tmp, wheel.name), False)
+            # Fails if another process stored the wheel first
+            with contextlib.suppress(OSError):
+                os.rename(tmp, self._path / key)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self._path):
+            if entry.name.startswith('.'):
+                continue
+            with contextlib.suppress(OSError):
+                entries.append((entry.stat().st_mtime, entry.path))
+        entries.sort()
+        for _, path in entries[: max(len(entries) - self._max_entries, 0)]:
+            shutil.rmtree(path, ignore_errors=True)
 
 
 @contextlib.contextmanager  # type: ignore[arg-type]
-def _builder(
-    srcdir: os.PathLike[str] | str,
+def _build_env(
     isolated: bool = True,
-    quiet: bool = False,
-) -> Iterable[tuple[environment_helpers.Environment, build.ProjectBuilder]]:
+    pool: BuildEnvironmentPool | None = None,
+    requirements: Collection[str] = (),
+) -> Iterable[environment_helpers.Environment]:
+    env: environment_helpers.Environment
+    with contextlib.ExitStack() as stack:
+        with environment_helpers.trace.span(
+            'build.environment', isolated=isolated, requirements=list(requirements)
+        ):
+            if isolated and pool:
+                env = stack.enter_context(pool.lease(requirements))
+            elif isolated:
+                envdir = stack.enter_context(
+                    tempfile.TemporaryDirectory(prefix='environment-helpers-env-')
+                )
+                with _limit_env_creation():
+                    env = environment_helpers.create_venv(envdir)
+                    env.install(requirements)
+            else:
+                env = environment_helpers.CurrentEnvironment()
+                env.install(requirements)
+        yield env
+
+
+# Amount of output kept from quiet backend calls, to report errors
+_QUIET_OUTPUT_TAIL = 64 * 1024
+
+
+def _runner(env: environment_helpers.Environment, quiet: bool) -> Callable[..., None]:
     def runner(
         cmd: Sequence[str],
         cwd: str | None,
         extra_environ: Mapping[str, str] | None = None,
     ) -> None:
-        subprocess.run(cmd, check=True, capture_output=quiet, cwd=cwd, env=env.env | extra_environ)  # type: ignore[operator]
+        with environment_helpers.trace.span('build.backend', command=list(cmd)) as span:
+            try:
+                if not quiet:
+                    subprocess.run(cmd, check=True, cwd=cwd, env=env.env | extra_environ)  # type: ignore[operator]
+                else:
+                    # Only keep the end of the output, which is set in the CalledProcessError
+                    # (the cause of the build.BuildBackendException) if the backend fails
+                    output = environment_helpers._utils.run_streaming(
+                        cmd,
+                        chunk_size=io.DEFAULT_BUFFER_SIZE,
+                        tail=_QUIET_OUTPUT_TAIL,
+                        stderr=subprocess.STDOUT,
+                        cwd=cwd,
+                        env=env.env | extra_environ,  # type: ignore[operator]
+                    )
+                    collections.deque(output, maxlen=0)
+            except subprocess.CalledProcessError as e:
+                span['returncode'] = e.returncode
+                raise
+            span['returncode'] = 0
+
+    return runner
 
+
+@contextlib.contextmanager  # type: ignore[arg-type]
+def _builder(
+    srcdir: os.PathLike[str] | str,
+    isolated: bool = True,
+    quiet: bool = False,
+    pool: BuildEnvironmentPool | None = None,
+) -> Iterable[tuple[environment_helpers.Environment, build.ProjectBuilder]]:
     env: environment_helpers.Environment
-    with _build_env(isolated) as env:
-        yield env, build.ProjectBuilder(srcdir, env.interpreter, runner)  # type: ignore[arg-type, attr-defined]
+    requirements = build.ProjectBuilder(srcdir).build_system_requires
+    with _build_env(isolated, pool, requirements) as env:
+        yield env, build.ProjectBuilder(srcdir, env.interpreter, _runner(env, quiet))  # type: ignore[arg-type]
+
+
+def _extract_sdist(sdist: pathlib.Path, outdir: os.PathLike[str] | str) -> pathlib.Path:
+    # Read the archive as a stream, as we only need to go through it once
+    with tarfile.open(sdist, 'r|*') as t:
+        if hasattr(tarfile, 'data_filter'):
+            t.extractall(outdir, filter='data')
+        else:
+            t.extractall(outdir)
+    return pathlib.Path(outdir, sdist.name[: -len('.tar.gz')])
 
 
 def build_sdist(
@@ -47,11 +516,14 @@ def build_sdist(
     config_settings: build.ConfigSettingsType | None = None,
     isolated: bool = True,
     quiet: bool = False,
+    pool: BuildEnvironmentPool | None = None,
 ) -> pathlib.Path:
     env: environment_helpers.Environment
     builder: build.ProjectBuilder
-    with _builder(srcdir, isolated, quiet) as (env, builder):  # type: ignore[misc]
-        env.install(builder.build_system_requires)
+    with (
+        environment_helpers.trace.span('build', srcdir=os.fspath(srcdir), distribution='sdist'),
+        _builder(srcdir, isolated, quiet, pool) as (env, builder),  # type: ignore[misc]
+    ):
         env.install(builder.get_requires_for_build('sdist', config_settings or {}))
         sdist_name = builder.build('sdist', outdir, config_settings or {})
     return pathlib.Path(outdir, sdist_name)
@@ -63,14 +535,30 @@ def build_wheel(
     config_settings: build.ConfigSettingsType | None = None,
     isolated: bool = True,
     quiet: bool = False,
+    pool: BuildEnvironmentPool | None = None,
+    cache: WheelCache | None = None,
 ) -> pathlib.Path:
+    """Build a wheel of a project.
+
+    :param cache: Cache to reuse the wheel from, if the project didn't change since it was
+                  last built, and to store the new wheel in otherwise.
+    """
+    if cache is not None:
+        key = cache.key(srcdir, config_settings, isolated)
+        if cached := cache.get(key, outdir):
+            return cached
     env: environment_helpers.Environment
     builder: build.ProjectBuilder
-    with _builder(srcdir, isolated, quiet) as (env, builder):  # type: ignore[misc]
-        env.install(builder.build_system_requires)
+    with (
+        environment_helpers.trace.span('build', srcdir=os.fspath(srcdir), distribution='wheel'),
+        _builder(srcdir, isolated, quiet, pool) as (env, builder),  # type: ignore[misc]
+    ):
         env.install(builder.get_requires_for_build('wheel', config_settings or {}))
         wheel_name = builder.build('wheel', outdir, config_settings or {})
-    return pathlib.Path(outdir, wheel_name)
+    wheel = pathlib.Path(outdir, wheel_name)
+    if cache is not None:
+        cache.put(key, wheel)
+    return wheel
 
 
 def build_wheel_via_sdist(
@@ -79,12 +567,153 @@ def build_wheel_via_sdist(
     config_settings: build.ConfigSettingsType | None = None,
     isolated: bool = True,
     quiet: bool = False,
+    pool: BuildEnvironmentPool | None = None,
+    keep_sdist: bool = True,
+    cache: WheelCache | None = None,
 ) -> pathlib.Path:
-    sdist = build_sdist(srcdir, outdir, config_settings or {})
-    with tempfile.TemporaryDirectory(prefix='environment-helpers-') as workdir:
-        # Extract sdist
-        with tarfile.TarFile.open(sdist) as t:
-            t.extractall(workdir)
-        sdist_dir = os.path.join(workdir, sdist.name[: -len('.tar.gz')])
+    """Build a wheel from the sdist of a project.
+
+    Both the sdist and the wheel are built in the same build environment.
+
+    :param keep_sdist: Whether to write the sdist to the output directory, otherwise it is only
+                       written to a temporary directory.
+    :param cache: Cache to reuse the wheel from, if the project didn't change since it was
+                  last built, and to store the new wheel in otherwise. When the cached wheel
+                  is used, the sdist isn't built.
+    """
+    if cache is not None:
+        key = cache.key(srcdir, config_settings, isolated, via_sdist=True)
+        if cached := cache.get(key, outdir):
+            return cached
+    env: environment_helpers.Environment
+    builder: build.ProjectBuilder
+    with (
+        environment_helpers.trace.span(
+            'build', srcdir=os.fspath(srcdir), distribution='wheel', via_sdist=True
+        ),
+        tempfile.TemporaryDirectory(prefix='environment-helpers-') as workdir,
+        _builder(srcdir, isolated, quiet, pool) as (env, builder),
+    ):
+        env.install(builder.get_requires_for_build('sdist', config_settings or {}))
+        sdist_name: str = builder.build(
+            'sdist', outdir if keep_sdist else workdir, config_settings or {}
+        )
+        sdist_dir = _extract_sdist(pathlib.Path(sdist_name), workdir)
         # Build wheel from sdist source
-        return build_wheel(sdist_dir, outdir, config_settings, isolated, quiet)
+        sdist_builder = build.ProjectBuilder(sdist_dir, env.interpreter, _runner(env, quiet))
+        if sdist_builder.build_system_requires != builder.build_system_requires:
+            env.install(sdist_builder.build_system_requires)
+        env.install(sdist_builder.get_requires_for_build('wheel', config_settings or {}))
+        wheel_name = sdist_builder.build('wheel', outdir, config_settings or {})
+    wheel = pathlib.Path(outdir, wheel_name)
+    if cache is not None:
+        cache.put(key, wheel)
+    return wheel
+
+
+class BuildResult(NamedTuple):
+    """Result of building a project with :func:`build_many`."""
+
+    srcdir: pathlib.Path
+    wheel: pathlib.Path | None
+    error: BaseException | None
+
+
+def _portable_exception(exception: Exception) -> Exception:
+    """Get an exception that can be sent to another process.
+
+    Not all exceptions can be pickled (eg. build.BuildBackendException), so those are
+    replaced by a build.BuildException with the same message, and the captured output of the
+    failed backend call, if any.
+    """
+    try:
+        pickle.loads(pickle.dumps(exception))
+    except Exception:
+        message = f'{type(exception).__name__}: {exception}'
+        cause = getattr(exception, 'exception', None)
+        if isinstance(cause, subprocess.CalledProcessError) and cause.output:
+            output = cause.output.decode(errors='replace')
+            message += f'\n\nBackend output (tail):\n{output}'
+        return build.BuildException(message)
+    return exception
+
+
+def _init_build_many_worker(env_creation_limit: Any) -> None:
+    global _env_creation_limit
+    _env_creation_limit = env_creation_limit
+
+
+def _build_many_worker(
+    srcdir: pathlib.Path,
+    outdir: pathlib.Path,
+    config_settings: build.ConfigSettingsType | None,
+    isolated: bool,
+    quiet: bool,
+    via_sdist: bool,
+    pool: BuildEnvironmentPool | None,
+    cache: WheelCache | None,
+) -> pathlib.Path:
+    try:
+        if via_sdist:
+            return build_wheel_via_sdist(
+                srcdir, outdir, config_settings, isolated, quiet, pool, cache=cache
+            )
+        return build_wheel(srcdir, outdir, config_settings, isolated, quiet, pool, cache)
+    except Exception as e:
+        raise _portable_exception(e) from e
+
+
+def build_many(
+    srcdirs: Iterable[os.PathLike[str] | str],
+    outdir: os.PathLike[str] | str,
+    config_settings: build.ConfigSettingsType | None = None,
+    isolated: bool = True,
+    quiet: bool = True,
+    via_sdist: bool = False,
+    jobs: int | None = None,
+    max_env_creation: int | None = None,
+    pool: BuildEnvironmentPool | None = None,
+    cache: WheelCache | None = None,
+) -> Iterator[BuildResult]:
+    """Build wheels for multiple projects in parallel, using a process pool.
+
+    Results are yielded as soon as each build finishes, so they can be used before all the
+    builds are done. A failed build doesn't stop the others, its exception is reported in the
+    result instead, with the traceback from the worker process as its ``__cause__``.
+
+    :param srcdirs: Source directories of the projects.
+    :param outdir: Output directory for the wheels.
+    :param config_settings: Config settings passed to the backends.
+    :param isolated: Whether to build in isolated environments.
+    :param quiet: Whether to hide the output of the builds.
+    :param via_sdist: Whether to build the wheels from sdists (see :func:`build_wheel_via_sdist`).
+    :param jobs: Number of worker processes.
+    :param max_env_creation: Maximum number of build environments being created simultaneously.
+    :param pool: Build environment pool to use.
+    :param cache: Wheel cache to use.
+    """
+    paths = [pathlib.Path(srcdir) for srcdir in srcdirs]
+    outpath = pathlib.Path(outdir)
+    env_creation_limit = multiprocessing.Semaphore(max_env_creation) if max_env_creation else None
+    with concurrent.futures.ProcessPoolExecutor(
+        jobs,
+        initializer=_init_build_many_worker,
+        initargs=(env_creation_limit,),
+    ) as executor:
+        futures = {
+            executor.submit(
+                _build_many_worker,
+                path,
+                outpath,
+                config_settings,
+                isolated,
+                quiet,
+                via_sdist,
+                pool,
+                cache,
+            ): path
+            for path in paths
+        }
+        for future in concurrent.futures.as_completed(futures):
+            error = future.exception()
+            yield BuildResult(futures[future], None if error else future.result(), error)
@@ -0,0 +1,297 @@
+"""Discovery of the Python interpreters available in the system.
+
+Example::
+
+    registry = environment_helpers.discovery.discover()
+    interpreter = registry.find('3.12')
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import pathlib
+import re
+import stat
+import subprocess
+import time
+
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+
+import packaging.specifiers
+import packaging.version
+
+import environment_helpers
+import environment_helpers._utils
+import environment_helpers.introspect
+import environment_helpers.trace
+
+
+# Eg. python, python3, python3.12, python3.13t, pypy3.10, python.exe
+_NAME_RE = re.compile(r'(python|pypy)(\d+(\.\d+)?t?)?(\.exe)?', re.IGNORECASE)
+
+# Directories where interpreters are usually installed, besides the ones on PATH
+_COMMON_DIRS: tuple[str, ...]
+if os.name == 'nt':
+    _COMMON_DIRS = (
+        '~/AppData/Local/Programs/Python/Python*',
+        '~/.pyenv/pyenv-win/versions/*',
+        '~/AppData/Roaming/uv/python/*',
+        'C:/Python*',
+        'C:/Program Files/Python*',
+    )
+else:
+    _COMMON_DIRS = (
+        '/usr/bin',
+        '/usr/local/bin',
+        '/opt/homebrew/bin',
+        '/opt/python/*/bin',
+        '/Library/Frameworks/Python.framework/Versions/*/bin',
+        '~/.pyenv/versions/*/bin',
+        '~/.local/share/uv/python/*/bin',
+        '~/.local/bin',
+    )
+
+_RELEASE_LEVELS = {'alpha': 'a', 'beta': 'b', 'candidate': 'rc'}
+
+# Failed candidates are only skipped for this long, in case the failure was transient
+_FAILURE_MAX_AGE = 24 * 60 * 60
+
+
+class Interpreter(NamedTuple):
+    """Python interpreter found by :func:`discover`."""
+
+    path: pathlib.Path
+    #: Implementation name, as in the ``implementation_name`` marker (eg. ``cpython``).
+    implementation: str
+    version: environment_helpers.introspect.PythonVersion
+    launcher_kind: environment_helpers.introspect.LauncherKind | None
+    scheme: environment_helpers.introspect.SchemeDict[pathlib.Path]
+    system_scheme: environment_helpers.introspect.SchemeDict[pathlib.Path]
+
+    @property
+    def packaging_version(self) -> packaging.version.Version:
+        major, minor, micro, releaselevel, serial = self.version
+        pre = f'{_RELEASE_LEVELS[releaselevel]}{serial}' if releaselevel in _RELEASE_LEVELS else ''
+        return packaging.version.Version(f'{major}.{minor}.{micro}{pre}')
+
+
+def _specifier(constraint: str) -> packaging.specifiers.SpecifierSet:
+    # Bare versions (eg. "3.12") select any release of that version
+    if re.fullmatch(r'\d+(\.\d+)*', constraint.strip()):
+        return packaging.specifiers.SpecifierSet(f'=={constraint.strip()}.*')
+    return packaging.specifiers.SpecifierSet(constraint)
+
+
+class InterpreterRegistry:
+    """Collection of interpreters, which can be queried by version constraint.
+
+    The interpreters are sorted from the newest version to the oldest.
+    """
+
+    def __init__(self, interpreters: Iterable[Interpreter]) -> None:
+        self._interpreters = sorted(
+            interpreters, key=lambda interpreter: interpreter.packaging_version, reverse=True
+        )
+
+    def __iter__(self) -> Iterator[Interpreter]:
+        return iter(self._interpreters)
+
+    def __len__(self) -> int:
+        return len(self._interpreters)
+
+    def select(
+        self, constraint: str | None = None, implementation: str | None = None
+    ) -> list[Interpreter]:
+        """Find the interpreters matching a version constraint, and implementation.
+
+        :param constraint: Version specifier (eg. ``>=3.11,<3.13``), or a version, which
+                           matches any release of it (eg. ``3.12``). If None, any version
+                           matches.
+        :param implementation: Implementation name (eg. ``cpython``, ``pypy``).
+        """
+        specifier = _specifier(constraint) if constraint else None
+        return [
+            interpreter
+            for interpreter in self._interpreters
+            if (implementation is None or interpreter.implementation == implementation.lower())
+            and (
+                specifier is None
+                or specifier.contains(interpreter.packaging_version, prereleases=True)
+            )
+        ]
+
+    def find(
+        self, constraint: str | None = None, implementation: str | None = None
+    ) -> Interpreter | None:
+        """Find the newest interpreter matching a version constraint, and implementation.
+
+        See :meth:`select`.
+        """
+        interpreters = self.select(constraint, implementation)
+        return interpreters[0] if interpreters else None
+
+
+def _search_dirs(roots: Iterable[os.PathLike[str] | str], path: bool, common: bool) -> list[str]:
+    dirs = []
+    for root_path in roots:
+        root = os.fspath(root_path)
+        dirs += [root, os.path.join(root, 'bin'), os.path.join(root, 'Scripts')]
+        dirs += glob.glob(os.path.join(glob.escape(root), '*', 'bin'))
+        if os.name == 'nt':
+            dirs += glob.glob(os.path.join(glob.escape(root), '*'))
+    if path:
+        dirs += os.environ.get('PATH', '').split(os.pathsep)
+    if common:
+        for pattern in _COMMON_DIRS:
+            dirs += glob.glob(os.path.expanduser(pattern))
+    return list(dict.fromkeys(os.path.abspath(directory) for directory in dirs if directory))
+
+
+def _candidate_key(path: str) -> tuple[int, int] | str | None:
+    """Key identifying the interpreter an executable points to, or None if it isn't one."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode) or not os.access(path, os.X_OK):
+        return None
+    # Wrapper scripts (eg. pyenv shims) run interpreters that can be found directly
+    try:
+        with open(path, 'rb') as f:
+            if f.read(2) == b'#!':
+                return None
+    except OSError:
+        return None
+    # Virtual environment interpreters usually link to (or are copies of) the base interpreter,
+    # but there's only one interpreter per environment
+    directory = os.path.dirname(path)
+    for config in (
+        os.path.join(directory, 'pyvenv.cfg'),
+        os.path.join(directory, '..', 'pyvenv.cfg'),
+    ):
+        if os.path.isfile(config):
+            return os.path.realpath(config)
+    return st.st_dev, st.st_ino
+
+
+def find_candidates(
+    roots: Iterable[os.PathLike[str] | str] = (),
+    path: bool = True,
+    common: bool = True,
+) -> list[pathlib.Path]:
+    """Find the executables that look like Python interpreters, without running them.
+
+    Executables pointing to the same file, via symlinks or hardlinks, are only included once,
+    unless they belong to different virtual environments, and only one executable is included
+    for each virtual environment. Wrapper scripts (eg. pyenv shims) are skipped, as the
+    interpreters they run can be found directly.
+
+    :param roots: Additional directories to search. Their ``bin`` and ``Scripts``
+                  subdirectories, and the ``bin`` subdirectories of their children (eg.
+                  ``/opt/python/3.12/bin``), are also searched.
+    :param path: Whether to search the directories on ``PATH``.
+    :param common: Whether to search the directories where interpreters are usually installed.
+    """
+    candidates = []
+    seen = set()
+    for directory in _search_dirs(roots, path, common):
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        for name in filter(_NAME_RE.fullmatch, names):
+            candidate = os.path.join(directory, name)
+            key = _candidate_key(candidate)
+            if key is not None and key not in seen:
+                seen.add(key)
+                candidates.append(pathlib.Path(candidate))
+    return candidates
+
+
+def _failure_marker(path: pathlib.Path) -> pathlib.Path:
+    identity = environment_helpers.introspect._interpreter_identity(path)
+    # Failures may be caused by the introspection code, so they are specific to its version
+    identity['cache-version'] = environment_helpers.introspect._PERSISTENT_CACHE_VERSION
+    identity['version'] = environment_helpers.__version__
+    key = hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+    return environment_helpers._utils.cache_dir() / 'discovery' / 'failed' / key
+
+
+def _failed_recently(marker: pathlib.Path) -> bool:
+    try:
+        return time.time() - marker.stat().st_mtime < _FAILURE_MAX_AGE
+    except OSError:
+        return False
+
+
+def _introspect(path: pathlib.Path, cache: bool, timeout: float | None) -> Interpreter | None:
+    marker = None
+    try:
+        # The interpreter may be removed while probing it, so errors here are probe failures too
+        marker = _failure_marker(path) if cache else None
+        if marker and _failed_recently(marker):
+            return None
+        introspectable = environment_helpers.introspect.get_introspectable(path, cache=cache)
+        snapshot = introspectable.snapshot(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        # Possibly a transient failure, so it isn't remembered
+        return None
+    except Exception:
+        # Not a working interpreter, or an unsupported version (eg. Python 2)
+        if marker:
+            with contextlib.suppress(OSError):
+                environment_helpers._utils.atomic_write(marker, b'')
+        return None
+    return Interpreter(
+        path=path,
+        implementation=snapshot.marker_environment['implementation_name'],
+        version=snapshot.version,
+        launcher_kind=snapshot.launcher_kind,
+        scheme=snapshot.scheme,
+        system_scheme=snapshot.system_scheme,
+    )
+
+
+def discover(
+    roots: Iterable[os.PathLike[str] | str] = (),
+    path: bool = True,
+    common: bool = True,
+    jobs: int | None = None,
+    cache: bool = True,
+    timeout: float | None = 10,
+) -> InterpreterRegistry:
+    """Find the Python interpreters available in the system, and introspect them.
+
+    The candidates (see :func:`find_candidates`) are introspected concurrently, and the ones
+    that fail to run, or don't finish in time, are left out. By default, the introspection
+    data is stored in the persistent cache, so the interpreters that didn't change since the
+    last discovery aren't run again. The candidates that failed are also skipped for a day,
+    unless they change.
+
+    :param roots: Additional directories to search.
+    :param path: Whether to search the directories on ``PATH``.
+    :param common: Whether to search the directories where interpreters are usually installed.
+    :param jobs: Maximum number of interpreters to introspect simultaneously.
+    :param cache: Whether to use the persistent cache for the introspection data.
+    :param timeout: Time to wait for each candidate, in seconds.
+    """
+    with environment_helpers.trace.span('discovery') as span:
+        candidates = find_candidates(roots, path, common)
+        span['candidates'] = len(candidates)
+        with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+            futures = [
+                environment_helpers.trace.submit(executor, _introspect, candidate, cache, timeout)
+                for candidate in candidates
+            ]
+            interpreters = [future.result() for future in futures]
+        registry = InterpreterRegistry(
+            interpreter for interpreter in interpreters if interpreter is not None
+        )
+        span['interpreters'] = len(registry)
+    return registry
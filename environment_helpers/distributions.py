@@ -0,0 +1,353 @@
+"""Helpers for the distributions installed in an environment."""
+
+from __future__ import annotations
+
+import collections
+import configparser
+import contextlib
+import csv
+import email.message
+import email.parser
+import functools
+import os
+import pathlib
+import shutil
+import threading
+import time
+
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping
+from typing import NamedTuple
+
+import packaging.requirements
+import packaging.utils
+import packaging.version
+
+import environment_helpers._utils
+
+
+def _metadata_name_version(path: str) -> tuple[str, str] | None:
+    """Read the name and version from a ``METADATA`` file, only parsing the headers we need."""
+    name = version = None
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if not line.strip():
+                    break
+                key, _, value = line.partition(':')
+                if key.lower() == 'name':
+                    name = value.strip()
+                elif key.lower() == 'version':
+                    version = value.strip()
+                if name and version:
+                    return name, version
+    except OSError:
+        pass
+    return None
+
+
+class EntryPoint(NamedTuple):
+    """Entry point declared by an installed distribution."""
+
+    name: str
+    group: str
+    #: Object reference (eg. ``package.module:function``).
+    value: str
+    #: Normalized name of the distribution declaring it.
+    distribution: str
+
+
+class Distribution:
+    """Distribution installed in an environment.
+
+    The name and version are taken from the ``.dist-info`` directory name, when it follows the
+    standard format, so the metadata files are only read when needed.
+
+    :param path: Path of the ``.dist-info`` directory.
+    """
+
+    def __init__(self, path: os.PathLike[str] | str) -> None:
+        self.path = pathlib.Path(path)
+        name, sep, version = self.path.name[: -len('.dist-info')].partition('-')
+        if not sep or '-' in version:
+            name, version = _metadata_name_version(os.path.join(path, 'METADATA')) or ('', '')
+        #: Normalized name of the distribution.
+        self.name = packaging.utils.canonicalize_name(name)
+        self.version = version
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({os.fspath(self.path)!r})'
+
+    @functools.cached_property
+    def metadata(self) -> email.message.Message:
+        """Core metadata, from the ``METADATA`` file."""
+        with self.path.joinpath('METADATA').open(encoding='utf-8', errors='replace') as f:
+            return email.parser.Parser().parse(f)
+
+    @functools.cached_property
+    def files(self) -> list[pathlib.Path]:
+        """Absolute paths of the installed files, from the ``RECORD`` file."""
+        try:
+            with self.path.joinpath('RECORD').open(encoding='utf-8', newline='') as f:
+                rows = list(csv.reader(f))
+        except OSError:
+            return []
+        return [
+            pathlib.Path(os.path.normpath(os.path.join(self.path.parent, row[0])))
+            for row in rows
+            if row
+        ]
+
+    @functools.cached_property
+    def entry_points(self) -> list[EntryPoint]:
+        """Entry points, from the ``entry_points.txt`` file."""
+        parser = configparser.ConfigParser(delimiters=('=',), interpolation=None)
+        parser.optionxform = str  # type: ignore[assignment, method-assign]
+        try:
+            parser.read(self.path / 'entry_points.txt', encoding='utf-8')
+        except configparser.Error:
+            return []
+        return [
+            EntryPoint(name, group, value, self.name)
+            for group in parser.sections()
+            for name, value in parser.items(group)
+        ]
+
+
+# Directory modification times closer than this to the scan time aren't trusted, as changes
+# made within the filesystem timestamp granularity wouldn't be noticed
+_MTIME_GRACE_NS = 1_000_000_000
+
+
+class DistributionIndex:
+    """Index of the distributions installed in some directories (eg. ``purelib`` and ``platlib``).
+
+    Only ``.dist-info`` directories are considered. If a distribution is present in more than
+    one directory, the first one takes precedence, like on ``sys.path``.
+
+    The directories are rescanned, when the index is used, if their modification time changed,
+    which happens when distributions are installed, or removed. The metadata files of each
+    distribution are only read when needed.
+
+    :param paths: Directories to index.
+    """
+
+    def __init__(self, paths: Iterable[os.PathLike[str] | str]) -> None:
+        self._paths = list(dict.fromkeys(os.fspath(path) for path in paths))
+        self._lock = threading.Lock()
+        self._mtimes: dict[str, int | None] = dict.fromkeys(self._paths)
+        self._scanned: dict[str, dict[str, Distribution]] = {}
+        self._distributions: dict[str, Distribution] = {}
+        self._owners: dict[str, Distribution] | None = None
+
+    def _scan(self, path: str) -> dict[str, Distribution]:
+        found: dict[str, Distribution] = {}
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return found
+        for entry in entries:
+            if entry.name.endswith('.dist-info') and entry.is_dir():
+                distribution = Distribution(entry.path)
+                if distribution.name:
+                    found.setdefault(distribution.name, distribution)
+        return found
+
+    def _refresh(self) -> dict[str, Distribution]:
+        with self._lock:
+            changed = False
+            for path in self._paths:
+                try:
+                    mtime: int | None = os.stat(path).st_mtime_ns
+                except OSError:
+                    mtime = -1
+                if mtime == self._mtimes[path] and path in self._scanned:
+                    continue
+                if mtime is not None and time.time_ns() - mtime < _MTIME_GRACE_NS:
+                    mtime = None
+                self._scanned[path] = self._scan(path)
+                self._mtimes[path] = mtime
+                changed = True
+            if changed:
+                distributions: dict[str, Distribution] = {}
+                for path in reversed(self._paths):
+                    distributions |= self._scanned[path]
+                self._distributions = distributions
+                self._owners = None
+            return self._distributions
+
+    def __iter__(self) -> Iterator[Distribution]:
+        return iter(list(self._refresh().values()))
+
+    def __len__(self) -> int:
+        return len(self._refresh())
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.get(name) is not None
+
+    def get(self, name: str) -> Distribution | None:
+        """Find a distribution by name (which doesn't need to be normalized)."""
+        return self._refresh().get(packaging.utils.canonicalize_name(name))
+
+    def versions(self) -> dict[str, str]:
+        """Version of each distribution, keyed by the normalized name."""
+        return {name: dist.version for name, dist in self._refresh().items()}
+
+    def owner(self, path: os.PathLike[str] | str) -> Distribution | None:
+        """Find the distribution that installed a file, according to the ``RECORD`` files."""
+        distributions = self._refresh()
+        with self._lock:
+            if self._owners is None:
+                self._owners = {
+                    os.path.normcase(file): distribution
+                    for distribution in distributions.values()
+                    for file in distribution.files
+                }
+            owners = self._owners
+        return owners.get(os.path.normcase(os.path.abspath(path)))
+
+    def entry_points(self, group: str | None = None) -> Iterator[EntryPoint]:
+        """Iterate over the entry points of all distributions, optionally only in a group."""
+        for distribution in self._refresh().values():
+            for entry_point in distribution.entry_points:
+                if group is None or entry_point.group == group:
+                    yield entry_point
+
+
+_registry = environment_helpers._utils.Registry[DistributionIndex]()
+
+
+def get_index(paths: Iterable[os.PathLike[str] | str]) -> DistributionIndex:
+    """Get a shared :class:`DistributionIndex` for some directories.
+
+    Calls for the same directories return the same object, so they are only scanned again if
+    they change.
+    """
+    key = tuple(os.path.abspath(path) for path in paths)
+    return _registry.get(key, lambda: DistributionIndex(key))
+
+
+def installed_versions(paths: Iterable[os.PathLike[str] | str]) -> dict[str, str]:
+    """Find the distributions installed in the given directories.
+
+    See :class:`DistributionIndex`.
+
+    :param paths: Directories to search (eg. the ``purelib`` and ``platlib`` paths).
+    :returns: The version of each distribution, keyed by the normalized distribution name.
+    """
+    return DistributionIndex(paths).versions()
+
+
+def _is_relative_to(path: str, roots: Collection[str]) -> bool:
+    return any(os.path.commonpath([path, root]) == root for root in roots)
+
+
+def _remove_bytecode(modules: Mapping[str, Collection[str]]) -> int:
+    """Remove the bytecode of modules, given their names by directory."""
+    removed = 0
+    for directory, names in modules.items():
+        try:
+            entries = os.listdir(os.path.join(directory, '__pycache__'))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.endswith('.pyc') and entry.partition('.')[0] in names:
+                os.unlink(os.path.join(directory, '__pycache__', entry))
+                removed += 1
+    return removed
+
+
+def _remove_empty_directories(directories: Iterable[str], roots: Collection[str]) -> None:
+    for directory in sorted(directories, key=len, reverse=True):
+        while directory not in roots and _is_relative_to(directory, roots):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+
+def uninstall(distribution: Distribution, roots: Collection[os.PathLike[str] | str]) -> int:
+    """Remove an installed distribution, according to its ``RECORD`` file.
+
+    The bytecode compiled for the installed modules, and the ``.dist-info`` directory, are
+    also removed, as well as the directories left empty. Files outside of the ``roots`` (eg.
+    the environment directories) are left untouched.
+
+    :param distribution: Distribution to remove.
+    :param roots: Directories the distribution is allowed to remove files from.
+    :returns: The number of removed files.
+    """
+    root_paths = {os.path.abspath(root) for root in roots}
+    files = [
+        os.fspath(file)
+        for file in distribution.files
+        if _is_relative_to(os.fspath(file), root_paths) and not file.is_dir()
+    ]
+    removed = 0
+    modules: dict[str, set[str]] = collections.defaultdict(set)
+    for file in files:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(file)
+            removed += 1
+        name, ext = os.path.splitext(os.path.basename(file))
+        if ext == '.py':
+            modules[os.path.dirname(file)].add(name)
+    # Bytecode written at import time isn't in RECORD
+    removed += _remove_bytecode(modules)
+    shutil.rmtree(distribution.path, ignore_errors=True)
+
+    directories = {os.path.dirname(file) for file in files}
+    directories.update(os.path.join(directory, '__pycache__') for directory in modules)
+    _remove_empty_directories(directories, root_paths)
+    return removed
+
+
+def requirements_satisfied(
+    requirements: Collection[str],
+    versions: Mapping[str, str],
+    marker_environment: Callable[[], Mapping[str, str]],
+) -> bool:
+    """Check if all requirements are satisfied by the installed distributions.
+
+    The check is conservative, requirements with extras, or URLs, and invalid requirements,
+    are considered unsatisfied, and left for the installer to handle.
+
+    :param requirements: Requirement strings (see :pep:`508`).
+    :param versions: Installed distributions, as returned by :func:`installed_versions`.
+    :param marker_environment: Function returning the environment to evaluate markers with,
+                               only called if a requirement has markers.
+    """
+    environment = None
+    for requirement_string in requirements:
+        try:
+            requirement = packaging.requirements.Requirement(requirement_string)
+        except packaging.requirements.InvalidRequirement:
+            return False
+        if requirement.marker:
+            if environment is None:
+                environment = {**marker_environment(), 'extra': ''}
+            if not requirement.marker.evaluate(environment):
+                continue
+        if requirement.url or requirement.extras:
+            return False
+        version = versions.get(packaging.utils.canonicalize_name(requirement.name))
+        if version is None:
+            return False
+        try:
+            if not requirement.specifier.contains(version, prereleases=True):
+                return False
+        except packaging.version.InvalidVersion:
+            return False
+    return True
+
+
+def environment_satisfies(
+    env: environment_helpers.Environment, requirements: Collection[str]
+) -> bool:
+    """Check if all requirements are satisfied by the distributions installed in ``env``.
+
+    See :func:`requirements_satisfied`. The markers are evaluated against the introspected
+    values for the environment interpreter.
+    """
+    versions = env.distributions().versions()
+    return requirements_satisfied(requirements, versions, env.introspectable.get_marker_environment)
@@ -1,31 +1,374 @@
 from __future__ import annotations
 
+import concurrent.futures
+import contextlib
+import dataclasses
+import hashlib
+import json
 import os
 import pathlib
+import posixpath
+import shutil
+import subprocess
+import tempfile
+
+from collections.abc import Collection, Iterable, Iterator, Sequence
+from typing import Any, BinaryIO
 
 import installer
 import installer.destinations
+import installer.records
 import installer.sources
 import installer.utils
 
+import environment_helpers._utils
 import environment_helpers.introspect
+import environment_helpers.trace
 
 
-def install_wheel(
-    wheel: pathlib.Path,
+def _root_scheme(source: installer.sources.WheelFile) -> str:
+    wheel_metadata = installer.utils.parse_metadata_file(source.read_dist_info('WHEEL'))
+    return 'purelib' if wheel_metadata['Root-Is-Purelib'] == 'true' else 'platlib'
+
+
+def _scheme_path(
+    source: installer.sources.WheelFile, root_scheme: str, path: str
+) -> tuple[str, str]:
+    """Find the scheme, and the path inside it, for a file in the wheel."""
+    scheme, _, subpath = path.partition('/')[2].partition('/')
+    if posixpath.commonpath([source.data_dir, path]) == source.data_dir and subpath:
+        return scheme, subpath
+    return root_scheme, path
+
+
+class WheelStore:
+    """Content-addressed store of unpacked wheels.
+
+    Each wheel is unpacked once, keyed by the hash of the wheel file, and installations from
+    the store materialize the files as copy-on-write clones, or hardlinks, of the unpacked
+    files. Scripts and ``RECORD`` are still generated for each installation.
+
+    As installed files may be hardlinks to the store, they must not be modified in place.
+
+    :param path: Directory for the store. If None, it is placed in the cache directory.
+    """
+
+    def __init__(self, path: os.PathLike[str] | str | None = None) -> None:
+        self._path = pathlib.Path(
+            path if path is not None else environment_helpers._utils.cache_dir() / 'wheels'
+        )
+        # Wheel hashes, keyed by the file stat, to avoid rehashing known wheels
+        self._hashes: dict[tuple[str, int, int, int], str] = {}
+
+    def _hash(self, wheel: pathlib.Path) -> str:
+        stat = wheel.stat()
+        key = (os.path.abspath(wheel), stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key not in self._hashes:
+            hasher = hashlib.sha256()
+            with wheel.open('rb') as f:
+                while chunk := f.read(1024 * 1024):
+                    hasher.update(chunk)
+            self._hashes[key] = hasher.hexdigest()
+        return self._hashes[key]
+
+    @staticmethod
+    def _unpack_target(tmp: pathlib.Path, scheme: str, path: str) -> pathlib.Path:
+        # Like installer does when installing, reject paths that would be written outside of
+        # the scheme directory
+        if scheme not in installer.utils.SCHEME_NAMES:
+            raise ValueError(f"{path} is not contained in a valid scheme (unknown '{scheme}')")
+        root = os.path.abspath(tmp / 'files' / scheme)
+        target = os.path.abspath(os.path.join(root, path))
+        if os.path.commonpath([root, target]) != root:
+            raise ValueError(f'Attempting to write {path} outside of the target directory')
+        return pathlib.Path(target)
+
+    def unpack(self, wheel: os.PathLike[str] | str) -> pathlib.Path:
+        """Unpack a wheel into the store, if needed, and return its directory."""
+        wheel = pathlib.Path(wheel)
+        path = self._path / self._hash(wheel)
+        if path.joinpath('manifest.json').is_file():
+            return path
+
+        self._path.mkdir(parents=True, exist_ok=True)
+        tmp = pathlib.Path(tempfile.mkdtemp(prefix='.tmp-', dir=self._path))
+        try:
+            manifest = {}
+            with installer.sources.WheelFile.open(wheel) as source:
+                source.validate_record()
+                root_scheme = _root_scheme(source)
+                for (wheel_path, _, _), stream, is_executable in source.get_contents():
+                    scheme, scheme_path = _scheme_path(source, root_scheme, wheel_path)
+                    target = self._unpack_target(tmp, scheme, scheme_path)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    with target.open('wb') as f:
+                        hash_, size = installer.utils.copyfileobj_with_hashing(stream, f, 'sha256')
+                    if is_executable:
+                        installer.utils.make_file_executable(target)
+                    manifest[f'{scheme}/{scheme_path}'] = [hash_, size]
+            tmp.joinpath('manifest.json').write_text(json.dumps(manifest))
+            os.rename(tmp, path)
+        except OSError:
+            # Another process unpacked it first
+            if not path.joinpath('manifest.json').is_file():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return path
+
+
+_COMPILE_SCRIPT = pathlib.Path(__file__).parent / '_scripts' / 'compile.py'
+
+
+@dataclasses.dataclass
+class _Destination(installer.destinations.SchemeDictionaryDestination):
+    """Destination that can materialize files from a :class:`WheelStore` directory."""
+
+    store_path: pathlib.Path | None = None
+    # Unlike bytecode_optimization_levels, which compiles with the current interpreter, after
+    # writing RECORD, the bytecode is compiled by the target interpreter, and recorded
+    optimization_levels: Collection[int] = ()
+    compile_jobs: int | None = None
+    _manifest: dict[str, Any] = dataclasses.field(default_factory=dict, init=False, repr=False)
+    # Statistics for the instrumentation
+    files_written: int = dataclasses.field(default=0, init=False)
+    bytes_written: int = dataclasses.field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        if self.store_path:
+            self._manifest = json.loads(self.store_path.joinpath('manifest.json').read_bytes())
+
+    def write_file(
+        self,
+        scheme: installer.utils.Scheme,
+        path: str | os.PathLike[str],
+        stream: BinaryIO,
+        is_executable: bool,
+    ) -> installer.records.RecordEntry:
+        record = self._write_file(scheme, os.fspath(path), stream, is_executable)
+        self.files_written += 1
+        self.bytes_written += record.size or 0
+        return record
+
+    def _write_file(
+        self,
+        scheme: installer.utils.Scheme,
+        path: str,
+        stream: BinaryIO,
+        is_executable: bool,
+    ) -> installer.records.RecordEntry:
+        key = f'{scheme}/{path}'
+        # Scripts need their shebang rewritten for each destination
+        if scheme == 'scripts' or key not in self._manifest:
+            return super().write_file(scheme, path, stream, is_executable)
+
+        assert self.store_path
+        target = self._path_with_destdir(scheme, path)
+        if target.exists():
+            if not self.overwrite_existing:
+                raise FileExistsError(f'File already exists: {target!s}')
+            target.unlink()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        environment_helpers._utils.clone_file(self.store_path / 'files' / key, target)
+
+        hash_, size = self._manifest[key]
+        return installer.records.RecordEntry(path, installer.records.Hash('sha256', hash_), size)
+
+    def finalize_installation(
+        self,
+        scheme: installer.utils.Scheme,
+        record_file_path: str,
+        records: Iterable[tuple[installer.utils.Scheme, installer.records.RecordEntry]],
+    ) -> None:
+        records = list(records)
+        if self.optimization_levels:
+            records += self._compile_bytecode_files(records)
+        super().finalize_installation(scheme, record_file_path, records)
+
+    def _compile_bytecode_files(
+        self, records: Sequence[tuple[installer.utils.Scheme, installer.records.RecordEntry]]
+    ) -> list[tuple[installer.utils.Scheme, installer.records.RecordEntry]]:
+        """Compile the installed modules with the target interpreter, returning their records."""
+        modules = [
+            (scheme, record.path)
+            for scheme, record in records
+            if scheme in ('purelib', 'platlib') and record.path.endswith('.py')
+        ]
+        if not modules:
+            return []
+        request = {
+            # The paths embedded in the bytecode must not include the destdir
+            'files': [
+                [
+                    os.fspath(self._path_with_destdir(scheme, path)),
+                    os.path.join(self.scheme_dict[scheme], path),
+                ]
+                for scheme, path in modules
+            ],
+            'levels': sorted(set(self.optimization_levels)),
+            'jobs': self.compile_jobs,
+        }
+        with environment_helpers.trace.span(
+            'install.compile', files=len(modules), levels=request['levels']
+        ) as span:
+            output = subprocess.run(
+                [self.interpreter, os.fspath(_COMPILE_SCRIPT)],
+                input=json.dumps(request).encode(),
+                capture_output=True,
+                check=True,
+            ).stdout
+            results = json.loads(output)
+            span['bytes_written'] = sum(size for written in results for _, _, size in written)
+
+        compiled = []
+        for (scheme, _), written in zip(modules, results):
+            root = self._path_with_destdir(scheme, '')
+            for cfile, digest, size in written:
+                path = os.path.relpath(cfile, root).replace(os.sep, '/')
+                record = installer.records.RecordEntry(
+                    path, installer.records.Hash('sha256', digest), size
+                )
+                compiled.append((scheme, record))
+        return compiled
+
+
+def _destination(
     interpreter: pathlib.Path,
     scheme: str | None = None,
-) -> None:
-    """Install a wheel file to a Python environment."""
-    introspectable = environment_helpers.introspect.Introspectable(interpreter)
-    destination = installer.destinations.SchemeDictionaryDestination(
+    store_path: pathlib.Path | None = None,
+) -> _Destination:
+    introspectable = environment_helpers.introspect.get_introspectable(interpreter)
+    # Collect everything we need in a single interpreter run
+    snapshot = introspectable.snapshot()
+    return _Destination(
         scheme_dict=environment_helpers.introspect.scheme_dict_as_sysconfig(  # type: ignore[arg-type]
-            introspectable.get_scheme(),  # type: ignore[arg-type]
+            introspectable.get_scheme(scheme) if scheme else snapshot.scheme,  # type: ignore[arg-type]
         ),
         interpreter=os.fspath(interpreter),
         # FIXME: If the launcher kind is None, it means we don't support scripts for this platform.
         #        We set it to posix in that scenario because installer doesn't support this use-case.
-        script_kind=introspectable.get_launcher_kind() or 'posix',
+        script_kind=snapshot.launcher_kind or 'posix',
+        store_path=store_path,
+    )
+
+
+def _destination_paths(
+    source: installer.sources.WheelFile,
+    destination: installer.destinations.SchemeDictionaryDestination,
+) -> Iterator[str]:
+    """Find the paths a wheel will install to, based on its metadata."""
+    root_scheme = _root_scheme(source)
+    paths = [
+        _scheme_path(source, root_scheme, path)
+        for path, _, _ in installer.records.parse_record_file(
+            source.read_dist_info('RECORD').splitlines()
+        )
+    ]
+    if 'entry_points.txt' in source.dist_info_filenames:
+        for name, _, _, _ in installer.utils.parse_entrypoints(
+            source.read_dist_info('entry_points.txt')
+        ):
+            paths.append(('scripts', name))
+
+    for scheme, path in paths:
+        if scheme not in destination.scheme_dict:
+            raise ValueError(f"{path} is not contained in a valid scheme (unknown '{scheme}')")
+        yield os.path.normcase(os.path.abspath(os.path.join(destination.scheme_dict[scheme], path)))
+
+
+def install_wheel(
+    wheel: pathlib.Path,
+    interpreter: pathlib.Path,
+    scheme: str | None = None,
+    store: WheelStore | None = None,
+    optimization_levels: Collection[int] = (),
+) -> None:
+    """Install a wheel file to a Python environment.
+
+    :param wheel: Wheel file to install.
+    :param interpreter: Interpreter of the target environment.
+    :param scheme: Name of the target scheme name. If None, it uses the default scheme.
+    :param store: Wheel store to install the files from.
+    :param optimization_levels: Optimization levels to compile the installed modules with
+                                (eg. ``[0, 1]``), by the target interpreter, using a process
+                                pool. The bytecode files are included in ``RECORD``.
+    """
+    destination = dataclasses.replace(
+        _destination(interpreter, scheme, store.unpack(wheel) if store else None),
+        optimization_levels=optimization_levels,
     )
     with installer.sources.WheelFile.open(wheel) as source:
-        installer.install(source, destination, additional_metadata={})
+        _install(source, destination, wheel)
+
+
+def _install(
+    source: installer.sources.WheelFile, destination: _Destination, wheel: pathlib.Path
+) -> None:
+    with environment_helpers.trace.span('install.wheel', wheel=os.fspath(wheel)) as span:
+        try:
+            installer.install(source, destination, additional_metadata={})
+        finally:
+            span['files'] = destination.files_written
+            span['bytes_written'] = destination.bytes_written
+
+
+def install_wheels(
+    wheels: Sequence[pathlib.Path],
+    interpreter: pathlib.Path,
+    scheme: str | None = None,
+    jobs: int | None = None,
+    store: WheelStore | None = None,
+    optimization_levels: Collection[int] = (),
+) -> None:
+    """Install multiple wheel files to a Python environment, in parallel.
+
+    The environment is only introspected once, and all wheels are checked before any of them
+    is installed, so that invalid ``RECORD`` files, or wheels installing the same files, don't
+    result in a partial installation.
+
+    :param wheels: Wheel files to install.
+    :param interpreter: Interpreter of the target environment.
+    :param scheme: Name of the target scheme name. If None, it uses the default scheme.
+    :param jobs: Maximum number of wheels to install simultaneously.
+    :param store: Wheel store to install the files from.
+    :param optimization_levels: Optimization levels to compile the installed modules with
+                                (see :func:`install_wheel`). The bytecode of each wheel is
+                                compiled by its own process, as the wheels are installed.
+    """
+    destination = _destination(interpreter, scheme)
+
+    with contextlib.ExitStack() as stack:
+        sources = [stack.enter_context(installer.sources.WheelFile.open(wheel)) for wheel in wheels]
+        owners: dict[str, pathlib.Path] = {}
+        for wheel, source in zip(wheels, sources):
+            source.validate_record(validate_contents=False)
+            for path in _destination_paths(source, destination):
+                if path in owners:
+                    raise ValueError(f'{wheel.name} and {owners[path].name} both install {path}')
+                owners[path] = wheel
+        # installer isn't safe to use concurrently when creating new directories
+        for path in owners:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def install(wheel: pathlib.Path, source: installer.sources.WheelFile) -> None:
+            # Each wheel gets its own destination object, to collect its statistics
+            store_path = store.unpack(wheel) if store else None
+            _install(
+                source,
+                dataclasses.replace(
+                    destination,
+                    store_path=store_path,
+                    optimization_levels=optimization_levels,
+                    # The wheels are already installed in parallel
+                    compile_jobs=1 if len(wheels) > 1 else None,
+                ),
+                wheel,
+            )
+
+        with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+            futures = [
+                environment_helpers.trace.submit(executor, install, wheel, source)
+                for wheel, source in zip(wheels, sources)
+            ]
+            for future in futures:
+                future.result()
@@ -1,18 +1,32 @@
 from __future__ import annotations
 
+import contextlib
+import errno
 import functools
+import hashlib
+import io
 import json
+import mmap
 import os
 import pathlib
 import pickle
+import queue
+import re
+import shutil
+import struct
 import subprocess
 import sys
 import sysconfig
+import tempfile
+import threading
 import typing
 import warnings
 
-from collections.abc import Callable
-from typing import Any, Generic, Literal, NamedTuple, TypeVar
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import Any, Generic, Literal, NamedTuple, TypeVar, overload
+
+import environment_helpers._utils
+import environment_helpers.trace
 
 
 LauncherKind = Literal['posix', 'win-ia32', 'win-amd64', 'win-arm', 'win-arm64']
@@ -45,6 +59,32 @@ class PythonVersion(NamedTuple):
     serial: int
 
 
+class IntrospectionSnapshot(NamedTuple):
+    """All the introspection data for an environment. See :meth:`Introspectable.snapshot`."""
+
+    version: PythonVersion
+    scheme: SchemeDict[pathlib.Path]
+    system_scheme: SchemeDict[pathlib.Path]
+    launcher_kind: LauncherKind | None
+    marker_environment: dict[str, str]
+
+
+def _copy_cached(value: T) -> T:
+    """Copy the dictionaries in a cached value, so callers can't modify the cache."""
+    if isinstance(value, IntrospectionSnapshot):
+        return typing.cast(
+            T,
+            value._replace(
+                scheme=value.scheme.copy(),
+                system_scheme=value.system_scheme.copy(),
+                marker_environment=value.marker_environment.copy(),
+            ),
+        )
+    if isinstance(value, dict):
+        return typing.cast(T, value.copy())
+    return value
+
+
 def scheme_dict_as_sysconfig(scheme: SchemeDict[os.PathLike[str] | str]) -> SchemeDict[str]:
     return typing.cast(
         SchemeDict[str],
@@ -61,14 +101,59 @@ def _scheme_dict(scheme: dict[str, str]) -> SchemeDict[pathlib.Path]:
     )
 
 
-def get_virtual_environment_scheme(path: os.PathLike[str] | str) -> SchemeDict[pathlib.Path]:
-    """Calculates the installation paths for the scheme used by a certain virtual environment.
+class VirtualEnvironmentConfig(NamedTuple):
+    """Configuration of a virtual environment, from its ``pyvenv.cfg`` file."""
 
-    :param path: Path of the target virtual environment.
+    #: Directory of the base interpreter.
+    home: pathlib.Path | None
+    #: Python version of the environment (eg. ``3.12.1``).
+    version: str | None
+    include_system_site_packages: bool
+    #: All the values in the file.
+    values: Mapping[str, str]
+
+    @property
+    def base_prefix(self) -> pathlib.Path | None:
+        """Prefix of the base Python installation."""
+        if 'base-prefix' in self.values:
+            return pathlib.Path(self.values['base-prefix'])
+        if self.home is None:
+            return None
+        return self.home if os.name == 'nt' else self.home.parent
+
+
+def read_virtual_environment_config(path: os.PathLike[str] | str) -> VirtualEnvironmentConfig:
+    """Read the ``pyvenv.cfg`` file of a virtual environment.
+
+    :param path: Path of the virtual environment.
     """
-    config_vars = sysconfig.get_config_vars().copy()
-    config_vars['base'] = config_vars['platbase'] = os.fspath(path)
+    values = {}
+    with open(os.path.join(path, 'pyvenv.cfg'), encoding='utf-8') as f:
+        for line in f:
+            key, sep, value = line.partition('=')
+            if sep:
+                values[key.strip().lower()] = value.strip()
+    # venv writes "version", virtualenv and uv write "version_info" (eg. 3.12.1.final.0)
+    version = values.get('version') or values.get('version_info')
+    if version:
+        version = '.'.join(version.split('.')[:3])
+    return VirtualEnvironmentConfig(
+        home=pathlib.Path(values['home']) if values.get('home') else None,
+        version=version,
+        include_system_site_packages=(
+            values.get('include-system-site-packages', 'false').lower() == 'true'
+        ),
+        values=values,
+    )
 
+
+# Variables that depend on the environment, and are left in the scheme templates
+_SCHEME_PLACEHOLDERS = frozenset({'base', 'platbase', 'installed_base', 'installed_platbase'})
+
+
+@functools.cache
+def _virtual_environment_scheme_template(version: str) -> dict[str, str]:
+    """Install scheme for virtual environments of a Python version, with placeholders."""
     # Python 3.11 introduced a "venv" scheme in order to allow users to
     # calculate the paths for a virtual environment.
     # See https://github.com/python/cpython/issues/89576
@@ -80,37 +165,589 @@ def get_virtual_environment_scheme(path: os.PathLike[str] | str) -> SchemeDict[p
         scheme = 'posix_prefix'
     else:
         warnings.warn(
-            f"Unknown platform '{os.name}', using the default install scheme.", stacklevel=2
+            f"Unknown platform '{os.name}', using the default install scheme.", stacklevel=3
         )
-        return _scheme_dict(sysconfig.get_paths(vars=config_vars))
-    return _scheme_dict(sysconfig.get_paths(scheme=scheme, vars=config_vars))
+        scheme = sysconfig.get_default_scheme()
 
+    # The other variables (eg. platlibdir, abiflags) are taken from the current interpreter
+    major, minor, *_ = version.split('.')
+    config_vars = sysconfig.get_config_vars() | {
+        'py_version': version,
+        'py_version_short': f'{major}.{minor}',
+        'py_version_nodot': f'{major}{minor}',
+    }
+
+    def substitute(match: re.Match[str]) -> str:
+        name = match.group(1)
+        if name in _SCHEME_PLACEHOLDERS or config_vars.get(name) is None:
+            return match.group(0)
+        return str(config_vars[name])
+
+    return {
+        key: re.sub(r'\{(\w+)\}', substitute, template)
+        for key, template in sysconfig.get_paths(scheme, expand=False).items()
+    }
+
+
+def get_virtual_environment_scheme(path: os.PathLike[str] | str) -> SchemeDict[pathlib.Path]:
+    """Calculates the installation paths for the scheme used by a certain virtual environment.
+
+    The Python version, and base installation, are read from the ``pyvenv.cfg`` file of the
+    environment, so no subprocess is needed, and the scheme template for each version is
+    only calculated once. Without a ``pyvenv.cfg`` file, the current interpreter is assumed.
+
+    :param path: Path of the target virtual environment.
+    """
+    path = os.path.abspath(path)
+    try:
+        config = read_virtual_environment_config(path)
+    except OSError:
+        config = None
+    if config and config.version:
+        version = config.version
+    else:
+        version = '.'.join(map(str, sys.version_info[:3]))
+    base_prefix = config and config.base_prefix
+    installed_base = os.fspath(base_prefix) if base_prefix else sys.base_prefix
+    values = {
+        'base': path,
+        'platbase': path,
+        'installed_base': installed_base,
+        'installed_platbase': installed_base,
+    }
+    scheme = {}
+    for key, template in _virtual_environment_scheme_template(version).items():
+        for name, value in values.items():
+            template = template.replace(f'{{{name}}}', value)
+        scheme[key] = os.path.normpath(template)
+    return _scheme_dict(scheme)
+
+
+_SCRIPTS_PATH = pathlib.Path(__file__).parent / '_scripts'
+# Must match the message framing in _scripts/worker.py
+_WORKER_HEADER = struct.Struct('!Q')
+_WORKER_PROTOCOL = 4
+
+# With the mmap transport, buffers of at least this size are sent through memory-mapped files
+_MMAP_THRESHOLD = 64 * 1024
+_MMAP_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def _make_mmap_dir() -> str:
+    """Create a directory for the mmap transport files, in memory if possible."""
+    if _MMAP_DIR:
+        try:
+            return tempfile.mkdtemp(prefix='environment-helpers-', dir=_MMAP_DIR)
+        except OSError:
+            pass
+    return tempfile.mkdtemp(prefix='environment-helpers-')
+
+
+class _BufferPickler(pickle.Pickler):
+    """Pickler sending large bytes and memoryview objects as out-of-band buffers."""
+
+    def reducer_override(self, obj: Any) -> Any:
+        if type(obj) is memoryview or (type(obj) is bytes and len(obj) >= _MMAP_THRESHOLD):
+            return type(obj), (pickle.PickleBuffer(obj),)
+        return NotImplemented
+
+
+def _dump_message(obj: Any, mmap_dir: str | None) -> bytes:
+    """Serialize a worker message.
+
+    With the mmap transport (if ``mmap_dir`` is set), the message is pickled with protocol 5,
+    and the large buffers are written to a file in ``mmap_dir``, which is mapped to memory by
+    the receiver, so only a small control message goes through the pipe. The receiver removes
+    the file.
+    """
+    if mmap_dir is None:
+        return pickle.dumps(obj, protocol=_WORKER_PROTOCOL)
+
+    buffers: list[memoryview] = []
+
+    def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+        try:
+            raw = buffer.raw()
+        except BufferError:  # non-contiguous
+            return True
+        if raw.nbytes < _MMAP_THRESHOLD:
+            return True
+        buffers.append(raw)
+        return False
+
+    data = io.BytesIO()
+    _BufferPickler(data, protocol=5, buffer_callback=buffer_callback).dump(obj)
+    path = None
+    if buffers:
+        try:
+            path = _write_buffers(buffers, mmap_dir)
+        except OSError:
+            # Not enough space (eg. a small /dev/shm), so the buffers are sent through the pipe
+            data = io.BytesIO()
+            _BufferPickler(data, protocol=5).dump(obj)
+            return pickle.dumps((None, [], data.getvalue()), protocol=5)
+    sizes = [buffer.nbytes for buffer in buffers]
+    return pickle.dumps((path, sizes, data.getvalue()), protocol=5)
+
+
+def _write_buffers(buffers: list[memoryview], mmap_dir: str) -> str:
+    """Write buffers to a new file in ``mmap_dir``, returning its path."""
+    size = sum(buffer.nbytes for buffer in buffers)
+    if size > shutil.disk_usage(mmap_dir).free:
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC), mmap_dir)
+    fd, path = tempfile.mkstemp(dir=mmap_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for buffer in buffers:
+                f.write(buffer)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def _load_message(data: bytes, mmap_transport: bool) -> Any:
+    """Deserialize a worker message. See :func:`_dump_message`."""
+    if not mmap_transport:
+        return pickle.loads(data)
+
+    path, sizes, payload = pickle.loads(data)
+    buffers = []
+    if path:
+        try:
+            with open(path, 'rb') as f:
+                if os.name == 'nt':
+                    # The file can't be removed while it is mapped
+                    view = memoryview(f.read())
+                else:
+                    # Copy-on-write, so that the results are writable
+                    view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+        finally:
+            os.unlink(path)
+        offset = 0
+        for size in sizes:
+            buffers.append(view[offset : offset + size])
+            offset += size
+    return pickle.loads(payload, buffers=buffers)
+
+
+# Bump when the data returned by _scripts/snapshot.py changes
+_PERSISTENT_CACHE_VERSION = 2
+_SNAPSHOT_KEYS = {
+    ('version',),
+    ('scheme', None),
+    ('system-scheme',),
+    ('launcher-kind',),
+    ('marker-environment',),
+}
+
+
+def _interpreter_identity(interpreter: os.PathLike[str] | str) -> dict[str, Any]:
+    """Data identifying an interpreter, which changes if the interpreter is modified."""
+    path = pathlib.Path(os.path.abspath(interpreter))
+    stat = path.stat()
+    identity: dict[str, Any] = {
+        'path': os.fspath(path),
+        'realpath': os.path.realpath(path),
+        'inode': stat.st_ino,
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'pyvenv.cfg': None,
+    }
+    # Virtual environments usually link to the interpreter of the base environment,
+    # so we need to include their configuration.
+    for candidate in (path.parent / 'pyvenv.cfg', path.parent.parent / 'pyvenv.cfg'):
+        if candidate.is_file():
+            identity['pyvenv.cfg'] = candidate.read_text()
+            break
+    return identity
+
+
+class _PersistentCache:
+    """On-disk cache for the introspection data of an interpreter.
+
+    Entries are keyed by the interpreter identity, so they are invalidated when the interpreter
+    changes, and written atomically, so they are safe to use from multiple processes.
+    """
 
-class Introspectable:
     def __init__(self, interpreter: os.PathLike[str] | str) -> None:
-        self._interpreter = interpreter
+        self._identity = _interpreter_identity(interpreter)
+        self._identity['cache-version'] = _PERSISTENT_CACHE_VERSION
+        key = hashlib.sha256(json.dumps(self._identity, sort_keys=True).encode()).hexdigest()
+        self._path = environment_helpers._utils.cache_dir() / 'introspect' / f'{key}.json'
+
+    def load(self) -> Any:
+        try:
+            entry = json.loads(self._path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('identity') != self._identity:
+            return None
+        return entry.get('data')
+
+    def store(self, data: Any) -> None:
+        entry = {'identity': self._identity, 'data': data}
+        try:
+            environment_helpers._utils.atomic_write(self._path, json.dumps(entry).encode())
+        except OSError:
+            # The cache is best-effort
+            pass
+
+
+class CallError(Exception):
+    """A function called in the target environment raised an exception.
+
+    The original exception is available as ``__cause__``, if it could be transferred.
+    """
+
+    def __init__(self, message: str, traceback: str) -> None:
+        super().__init__(message)
+        self.traceback = traceback
+
+
+class _Exchange:
+    """State shared by the threads of a :meth:`_Worker.requests` call."""
+
+    def __init__(self) -> None:
+        self.replies: queue.SimpleQueue[tuple[str, Any]] = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.process: subprocess.Popen[bytes] | None = None
+        self.done = False
+        self.stopped = False
+        self.killed = False
 
-    def _run_script(self, name: str, **kwargs: Any) -> Any:
-        script = pathlib.Path(__file__).parent / '_scripts' / f'{name}.py'
-        data = subprocess.check_output([os.fspath(self._interpreter), os.fspath(script)], **kwargs)
+    def stop(self) -> None:
+        """Stop receiving replies, killing the worker process if it is still sending them."""
+        with self.lock:
+            self.stopped = True
+            if self.process is not None and not self.done:
+                self.process.kill()
+                self.killed = True
+
+
+class _Worker:
+    """Long-lived interpreter process answering requests sent over its stdin/stdout.
+
+    The process is started lazily, and restarted on the next request if it exits.
+
+    With the mmap transport, large buffers are exchanged through files in a temporary
+    directory, which is removed when the process is stopped.
+    """
+
+    def __init__(self, interpreter: os.PathLike[str] | str, mmap_transport: bool = False) -> None:
+        self._cmd = [os.fspath(interpreter), os.fspath(_SCRIPTS_PATH / 'worker.py')]
+        self._mmap_transport = mmap_transport
+        self._mmap_dir: str | None = None
+        self._process: subprocess.Popen[bytes] | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_process(self) -> subprocess.Popen[bytes]:
+        if self._process is None or self._process.poll() is not None:
+            self._cleanup()
+            cmd = self._cmd
+            if self._mmap_transport:
+                self._mmap_dir = _make_mmap_dir()
+                cmd = [*cmd, '--mmap', self._mmap_dir]
+            with environment_helpers.trace.span('introspect.worker', command=cmd):
+                self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return self._process
+
+    def _kill(self, process: subprocess.Popen[bytes]) -> int:
+        self._process = None
+        process.kill()
+        returncode = process.wait()
+        self._cleanup()
+        return returncode
+
+    def _cleanup(self) -> None:
+        if self._mmap_dir:
+            shutil.rmtree(self._mmap_dir, ignore_errors=True)
+            self._mmap_dir = None
+
+    @staticmethod
+    def _read_exactly(stream: typing.IO[bytes], size: int) -> bytes:
+        data = stream.read(size)
+        if len(data) != size:
+            raise EOFError
+        return data
+
+    @staticmethod
+    def _write_requests(stream: typing.IO[bytes], requests: list[bytes]) -> None:
+        # If the process exits, the error is reported when reading the replies
+        with contextlib.suppress(OSError):
+            for data in requests:
+                stream.write(_WORKER_HEADER.pack(len(data)) + data)
+            stream.flush()
+
+    def _exchange(self, messages: list[tuple[Any, ...]], exchange: _Exchange) -> None:
+        """Send the requests, and put their replies in the queue, holding the worker until done."""
+        with self._lock:
+            try:
+                with exchange.lock:
+                    process = exchange.process = self._ensure_process()
+                requests = [_dump_message(message, self._mmap_dir) for message in messages]
+            except Exception as e:
+                exchange.replies.put(('error', e))
+                return
+            assert process.stdin
+            assert process.stdout
+            writer = threading.Thread(
+                target=self._write_requests, args=(process.stdin, requests), daemon=True
+            )
+            writer.start()
+            received = 0
+            try:
+                while received < len(requests) and not exchange.stopped:
+                    (size,) = _WORKER_HEADER.unpack(
+                        self._read_exactly(process.stdout, _WORKER_HEADER.size)
+                    )
+                    reply = self._read_exactly(process.stdout, size)
+                    received += 1
+                    try:
+                        exchange.replies.put(('reply', _load_message(reply, self._mmap_transport)))
+                    except Exception as e:
+                        exchange.replies.put(('error', e))
+                with exchange.lock:
+                    exchange.done = received == len(requests)
+            except (OSError, EOFError):
+                if not exchange.stopped:
+                    error = subprocess.CalledProcessError(self._kill(process), self._cmd)
+                    exchange.replies.put(('error', error))
+            finally:
+                if (received < len(requests) or exchange.killed) and self._process is process:
+                    self._kill(process)
+                writer.join()
+
+    def requests(self, messages: Iterable[tuple[Any, ...]]) -> Iterator[tuple[Any, ...]]:
+        """Send multiple requests at once, and yield their replies, in order.
+
+        The requests are written, and the replies read, from separate threads, so that the
+        worker doesn't block on writing replies that aren't being read, and other requests can
+        be sent while iterating, in which case they wait for all the replies to be received.
+        If the iteration is stopped before that, the worker process is killed, as it would
+        otherwise still send the remaining replies.
+        """
+        messages = list(messages)
+        exchange = _Exchange()
+        reader = threading.Thread(
+            target=environment_helpers.trace.bind(self._exchange),
+            args=(messages, exchange),
+            daemon=True,
+        )
+        reader.start()
+        received = 0
+        try:
+            while received < len(messages):
+                kind, value = exchange.replies.get()
+                if kind == 'error':
+                    raise value
+                received += 1
+                yield value
+        finally:
+            if received < len(messages):
+                exchange.stop()
+            reader.join()
+
+    def request(self, message: tuple[Any, ...]) -> Any:
+        [reply] = self.requests([message])
+        return _reply_value(reply)
+
+    def close(self, timeout: float = 5) -> None:
+        with self._lock:
+            if self._process is None:
+                return
+            process, self._process = self._process, None
+            assert process.stdin
+            assert process.stdout
+            process.stdin.close()
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            self._cleanup()
+
+
+def _load_exception(data: bytes | None) -> BaseException | None:
+    """Unpickle an exception sent by the worker, if its class is available here."""
+    if data is None:
+        return None
+    try:
+        exception = pickle.loads(data)
+    except Exception:
+        return None
+    return exception if isinstance(exception, BaseException) else None
+
+
+def _reply_value(reply: tuple[Any, ...]) -> Any:
+    """Get the value from a worker reply, raising :class:`CallError` if the request failed."""
+    ok, *value = reply
+    if ok:
+        return value[0]
+    data, traceback = value
+    message = traceback.rstrip().rsplit('\n', maxsplit=1)[-1]
+    raise CallError(message, traceback) from _load_exception(data)
+
+
+def _function_name(func: str | Callable[..., Any]) -> tuple[str, str]:
+    """Split a function, or its qualified name, into its module and name."""
+    if isinstance(func, str):
+        module, func_name = func.rsplit('.', maxsplit=1)
+        return module, func_name
+    return func.__module__, func.__qualname__
+
+
+class Introspectable:
+    """Introspects the environment of a Python interpreter.
+
+    By default, every query runs in a new interpreter process. With ``worker=True``, queries
+    are sent to a single long-lived interpreter process instead, which is started on the first
+    query and restarted if it crashes. The worker process is stopped by :meth:`close`, or when
+    leaving the ``with`` block, if the object is used as a context manager.
+
+    With ``cache=True``, the data returned by :meth:`snapshot` (and the ``get_*`` methods
+    covered by it) is stored in a cache directory, and shared between processes. The cached
+    data is invalidated when the interpreter file, or the virtual environment configuration,
+    changes. The cache directory can be set with the ``ENVIRONMENT_HELPERS_CACHE_DIR``
+    environment variable.
+
+    With ``transport='mmap'``, large ``bytes``, ``memoryview``, and other objects supporting
+    pickle protocol 5 out-of-band buffers (eg. NumPy arrays), are transferred to and from
+    :meth:`call` and :meth:`call_many` through memory-mapped temporary files, instead of the
+    pipe. Objects backed by the buffer, such as ``memoryview`` and NumPy arrays, use the
+    mapped memory directly, without copying it. The files are placed in ``/dev/shm`` if
+    available, and buffers which don't fit are sent through the pipe. This requires the target
+    interpreter to be Python 3.8 or newer, and calls always run in a worker process (a
+    temporary one, if ``worker=False``).
+
+    :param interpreter: Path to the Python interpreter to introspect.
+    :param worker: Whether to use a long-lived worker process.
+    :param cache: Whether to use the persistent on-disk cache.
+    :param transport: How to transfer the arguments and results of function calls.
+    """
+
+    def __init__(
+        self,
+        interpreter: os.PathLike[str] | str,
+        worker: bool = False,
+        cache: bool = False,
+        transport: Literal['pipe', 'mmap'] = 'pipe',
+    ) -> None:
+        self._interpreter = interpreter
+        self._mmap_transport = transport == 'mmap'
+        self._worker = _Worker(interpreter, self._mmap_transport) if worker else None
+        self._persistent_cache = _PersistentCache(interpreter) if cache else None
+        self._cache: dict[tuple[str | None, ...], Any] = {}
+
+    def __enter__(self) -> Introspectable:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker process, if any."""
+        if self._worker:
+            self._worker.close()
+
+    def _run_script(
+        self,
+        name: str,
+        *args: str,
+        environ: Mapping[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> Any:
+        script = os.fspath(_SCRIPTS_PATH / f'{name}.py')
+        with environment_helpers.trace.span(
+            'introspect.script', script=name, worker=bool(self._worker)
+        ):
+            if self._worker:
+                data = self._worker.request(('script', script, list(args), dict(environ or {})))
+            else:
+                data = subprocess.check_output(
+                    [os.fspath(self._interpreter), script, *args],
+                    env=os.environ | dict(environ or {}),
+                    timeout=timeout,
+                )
         return json.loads(data)
 
+    def snapshot(self, timeout: float | None = None) -> IntrospectionSnapshot:
+        """Collects all the introspection data for the environment.
+
+        This helper needs to run the Python interpreter for the target environment, but only
+        once, as opposed to calling each ``get_*`` method. The results are also stored in the
+        caches used by the ``get_*`` methods.
+
+        :param timeout: Time to wait for the interpreter, in seconds, after which it is killed,
+                        and :class:`subprocess.TimeoutExpired` is raised. It doesn't apply to
+                        worker processes.
+        """
+        snapshot = self._cached_snapshot()
+        if snapshot is None:
+            snapshot = self._set_snapshot(self._run_script('snapshot', timeout=timeout), store=True)
+        return snapshot
+
+    def _cached_snapshot(self) -> IntrospectionSnapshot | None:
+        """Get the snapshot from the in-memory cache, or the persistent cache, if available."""
+        if ('snapshot',) not in self._cache and self._persistent_cache:
+            data = self._persistent_cache.load()
+            if data is not None:
+                self._set_snapshot(data)
+        return _copy_cached(
+            typing.cast(IntrospectionSnapshot | None, self._cache.get(('snapshot',)))
+        )
+
+    def _set_snapshot(self, data: Any, store: bool = False) -> IntrospectionSnapshot:
+        """Fill the caches from the data returned by the snapshot script."""
+        if store and self._persistent_cache:
+            self._persistent_cache.store(data)
+        snapshot = IntrospectionSnapshot(
+            version=PythonVersion(**data['version']),
+            scheme=_scheme_dict(data['scheme']),
+            system_scheme=_scheme_dict(data['system_scheme']),
+            launcher_kind=data['launcher_kind'],
+            marker_environment=data['marker_environment'],
+        )
+        self._cache.update(
+            {
+                ('version',): snapshot.version,
+                ('scheme', None): snapshot.scheme,
+                ('system-scheme',): snapshot.system_scheme,
+                ('launcher-kind',): snapshot.launcher_kind,
+                ('marker-environment',): snapshot.marker_environment,
+                ('snapshot',): snapshot,
+            }
+        )
+        return _copy_cached(snapshot)
+
+    def _cached(self, key: tuple[str | None, ...], compute: Callable[[], T]) -> T:
+        if key not in self._cache:
+            if self._persistent_cache and key in _SNAPSHOT_KEYS:
+                self.snapshot()
+            else:
+                self._cache[key] = compute()
+        return _copy_cached(typing.cast(T, self._cache[key]))
+
     def get_version(self) -> PythonVersion:
-        data = self._run_script('version')
-        return PythonVersion(**data)
+        """Finds the Python version.
+
+        This helper needs to run the Python interpreter for the target environment.
+        """
+        return self._cached(('version',), lambda: PythonVersion(**self._run_script('version')))
 
-    @functools.lru_cache
     def get_scheme(self, scheme: str | None = None) -> SchemeDict[pathlib.Path]:
         """Finds the installation paths for a certain Python install scheme.
 
         This helper needs to run the Python interpreter for the target environment.
 
-        :param interpreter: Path to the Python interpreter to introspect.
         :param scheme: Name of the target scheme name. If None, it uses the default scheme.
         """
-        return _scheme_dict(self._run_script('scheme'))
+        args = [scheme] if scheme else []
+        return self._cached(
+            ('scheme', scheme), lambda: _scheme_dict(self._run_script('scheme', *args))
+        )
 
-    @functools.lru_cache
     def get_system_scheme(self) -> SchemeDict[pathlib.Path]:
         """Finds the installation paths for the system Python install scheme.
 
@@ -119,18 +756,31 @@ class Introspectable:
 
         This helper needs to run the Python interpreter for the target environment.
         """
-        # Fedora automatically changes the default scheme unless RPM_BUILD_ROOT is set
-        environment = os.environ.copy()
-        environment['RPM_BUILD_ROOT'] = ''
-        return _scheme_dict(self._run_script('system-scheme', env=environment))
+        return self._cached(
+            ('system-scheme',),
+            # Fedora automatically changes the default scheme unless RPM_BUILD_ROOT is set
+            lambda: _scheme_dict(self._run_script('system-scheme', environ={'RPM_BUILD_ROOT': ''})),
+        )
 
-    @functools.lru_cache
     def get_launcher_kind(self) -> LauncherKind | None:
         """Find the launcher kind.
 
         This helper needs to run the Python interpreter for the target environment.
         """
-        return typing.cast(LauncherKind | None, self._run_script('launcher-kind'))
+        return self._cached(
+            ('launcher-kind',),
+            lambda: typing.cast(LauncherKind | None, self._run_script('launcher-kind')),
+        )
+
+    def get_marker_environment(self) -> dict[str, str]:
+        """Find the values of the environment markers (see :pep:`508`).
+
+        This helper needs to run the Python interpreter for the target environment.
+        """
+        return self._cached(
+            ('marker-environment',),
+            lambda: typing.cast(dict[str, str], self._run_script('marker-environment')),
+        )
 
     def call(self, func: str | Callable[[Any], T], *args: Any, **kwargs: Any) -> T:
         """Call the a function in the target environment.
@@ -139,20 +789,108 @@ class Introspectable:
         :param func: Function to call.
         :param args: Positional arguments to pass to the function.
         :param kwargs: Keyword arguments to pass to the function.
+
+        In worker mode, and with the mmap transport, exceptions raised by the function are
+        re-raised as :class:`CallError`.
         """
-        if isinstance(func, str):
-            module, func_name = func.rsplit('.', maxsplit=1)
-        else:
-            module = func.__module__
-            func_name = func.__qualname__
+        module, func_name = _function_name(func)
+        with environment_helpers.trace.span('introspect.call', function=f'{module}.{func_name}'):
+            return typing.cast(T, self._call(module, func_name, args, kwargs))
+
+    def _call(
+        self, module: str, func_name: str, args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> Any:
+        if self._worker:
+            return self._worker.request(('call', module, func_name, args, kwargs))
+        if self._mmap_transport:
+            with contextlib.closing(_Worker(self._interpreter, mmap_transport=True)) as worker:
+                return worker.request(('call', module, func_name, args, kwargs))
 
         args_dict = {'args': args, 'kwargs': kwargs}
         pickled_args_dict = pickle.dumps(args_dict)
 
-        script = pathlib.Path(__file__).parent / '_scripts' / 'call.py'
+        script = _SCRIPTS_PATH / 'call.py'
         data = subprocess.check_output(
             [os.fspath(self._interpreter), os.fspath(script), module, func_name],
             input=pickled_args_dict,
         )
 
-        return typing.cast(T, pickle.loads(data))
+        return pickle.loads(data)
+
+    @overload
+    def call_many(
+        self,
+        calls: Iterable[tuple[str | Callable[..., Any], Sequence[Any], Mapping[str, Any]]],
+        stream: Literal[False] = False,
+    ) -> list[Any]: ...
+
+    @overload
+    def call_many(
+        self,
+        calls: Iterable[tuple[str | Callable[..., Any], Sequence[Any], Mapping[str, Any]]],
+        stream: Literal[True],
+    ) -> Iterator[Any]: ...
+
+    def call_many(
+        self,
+        calls: Iterable[tuple[str | Callable[..., Any], Sequence[Any], Mapping[str, Any]]],
+        stream: bool = False,
+    ) -> list[Any] | Iterator[Any]:
+        """Call multiple functions in the target environment, in a single interpreter process.
+
+        The calls run sequentially, in order. If a call raises an exception, the result for
+        that call is a :class:`CallError` with the original exception as its cause, and the
+        following calls still run.
+
+        In worker mode, the calls run in the worker process, otherwise in a new process.
+
+        :param calls: ``(func, args, kwargs)`` tuples describing the calls.
+        :param stream: Whether to return an iterator, yielding the results as they are received.
+        """
+        messages = [
+            ('call', *_function_name(func), tuple(args), dict(kwargs))
+            for func, args, kwargs in calls
+        ]
+        results = self._call_many(messages)
+        return results if stream else list(results)
+
+    def _call_many(self, messages: list[tuple[Any, ...]]) -> Iterator[Any]:
+        if not messages:
+            return
+        worker = self._worker or _Worker(self._interpreter, self._mmap_transport)
+        with environment_helpers.trace._span(
+            'introspect.call', {'calls': len(messages)}, nest=False
+        ):
+            try:
+                for reply in worker.requests(messages):
+                    try:
+                        yield _reply_value(reply)
+                    except CallError as e:
+                        yield e
+            finally:
+                if worker is not self._worker:
+                    worker.close()
+
+
+_registry = environment_helpers._utils.Registry[Introspectable]()
+
+
+def get_introspectable(
+    interpreter: os.PathLike[str] | str,
+    worker: bool = False,
+    cache: bool = False,
+    transport: Literal['pipe', 'mmap'] = 'pipe',
+) -> Introspectable:
+    """Get a shared :class:`Introspectable` object for an interpreter.
+
+    Calls for the same interpreter and options return the same object, so the introspection
+    data only needs to be collected once. The interpreter is identified the same way as in
+    the persistent cache, so modifying it results in a new object.
+
+    :param interpreter: Path to the Python interpreter to introspect.
+    :param worker: Whether to use a long-lived worker process.
+    :param cache: Whether to use the persistent on-disk cache.
+    :param transport: How to transfer the arguments and results of function calls.
+    """
+    key = (*sorted(_interpreter_identity(interpreter).items()), worker, cache, transport)
+    return _registry.get(key, lambda: Introspectable(interpreter, worker, cache, transport))
@@ -0,0 +1,246 @@
+"""Instrumentation of the operations performed by environment-helpers.
+
+Operations, such as running subprocesses, creating environments, calling build backends, or
+installing wheels, are reported as spans, emitting a ``start`` and a ``stop`` :class:`Event`
+to the registered observers. Spans started while another one is active in the same thread
+(or asyncio task) are its children.
+
+Phases:
+
+- ``subprocess`` — a subprocess run (``command``, ``returncode``)
+- ``venv.create`` — creating a virtual environment (``path``, ``template``)
+- ``venv.snapshot`` — saving the files of a virtual environment (``path``)
+- ``venv.restore`` — restoring the files of a virtual environment (``path``, ``files``)
+- ``build`` — building a distribution (``srcdir``, ``distribution``)
+- ``build.environment`` — provisioning a build environment (``isolated``, ``requirements``)
+- ``build.backend`` — a build backend hook call (``command``, ``returncode``)
+- ``build.cache`` — looking up a wheel in a :class:`~environment_helpers.build.WheelCache`
+  (``key``, ``hit``)
+- ``install.path`` — building a project and installing it (``path``, ``from_sdist``)
+- ``install.requirements`` — installing requirements with an installer (``requirements``)
+- ``install.wheel`` — installing a wheel (``wheel``, ``files``, ``bytes_written``)
+- ``install.compile`` — compiling the bytecode of an installed wheel (``files``, ``levels``,
+  ``bytes_written``)
+- ``uninstall`` — uninstalling distributions (``distributions``, ``files``)
+- ``introspect.script`` — running an introspection script (``script``, ``worker``)
+- ``introspect.call`` — calling functions in the target environment (``function``, ``calls``)
+- ``introspect.worker`` — starting an introspection worker process (``command``)
+- ``discovery`` — discovering the interpreters in the system (``candidates``, ``interpreters``)
+
+Failed operations have an ``error`` attribute with the exception representation.
+
+Example::
+
+    with environment_helpers.trace.Collector() as collector:
+        environment_helpers.build.build_wheel(srcdir, outdir)
+    print(collector.summary())
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import itertools
+import threading
+import time
+
+from collections.abc import Callable, Iterator, Mapping
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, ParamSpec, TypeVar
+
+
+if TYPE_CHECKING:
+    import concurrent.futures
+
+
+_P = ParamSpec('_P')
+_T = TypeVar('_T')
+
+
+class Event(NamedTuple):
+    """Start or stop of a span."""
+
+    kind: Literal['start', 'stop']
+    phase: str
+    #: Identifier of the span, shared by its start and stop events.
+    id: int
+    #: Identifier of the parent span, if any.
+    parent: int | None
+    #: Time of the event, from :func:`time.perf_counter`.
+    time: float
+    #: Duration of the span, in seconds (stop events only).
+    duration: float | None
+    attributes: Mapping[str, Any]
+
+
+Observer = Callable[[Event], None]
+
+_observers: tuple[Observer, ...] = ()
+_observers_lock = threading.Lock()
+_ids = itertools.count(1)
+_current_span: contextvars.ContextVar[int | None] = contextvars.ContextVar(
+    'environment_helpers_span', default=None
+)
+
+
+def add_observer(observer: Observer) -> None:
+    """Register a callable to be called with every :class:`Event`.
+
+    Observers are called synchronously, from the thread performing the operation, so they
+    should be fast and thread-safe. Exceptions raised by observers are propagated.
+    """
+    global _observers
+    with _observers_lock:
+        _observers = (*_observers, observer)
+
+
+def remove_observer(observer: Observer) -> None:
+    global _observers
+    with _observers_lock:
+        observers = list(_observers)
+        observers.remove(observer)
+        _observers = tuple(observers)
+
+
+@contextlib.contextmanager
+def observe(observer: Observer) -> Iterator[Observer]:
+    """Register an observer for the duration of the ``with`` block."""
+    add_observer(observer)
+    try:
+        yield observer
+    finally:
+        remove_observer(observer)
+
+
+def _emit(event: Event) -> None:
+    for observer in _observers:
+        observer(event)
+
+
+def span(phase: str, **attributes: Any) -> contextlib.AbstractContextManager[dict[str, Any]]:
+    """Report an operation as a span.
+
+    Returns a context manager yielding a dictionary, where attributes only known at the end of
+    the operation (eg. the exit status) can be set, to be included in the stop event. If there
+    are no observers, nothing is recorded.
+    """
+    return _span(phase, attributes)
+
+
+@contextlib.contextmanager
+def _span(phase: str, attributes: dict[str, Any], nest: bool = True) -> Iterator[dict[str, Any]]:
+    # Spans wrapping generators can't be made the current span (nest=False), as the context
+    # would leak to the consumer
+    if not _observers:
+        yield attributes
+        return
+
+    span_id = next(_ids)
+    parent = _current_span.get()
+    token = _current_span.set(span_id) if nest else None
+    start = time.perf_counter()
+    _emit(Event('start', phase, span_id, parent, start, None, dict(attributes)))
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes['error'] = repr(e)
+        raise
+    finally:
+        if token is not None:
+            _current_span.reset(token)
+        end = time.perf_counter()
+        _emit(Event('stop', phase, span_id, parent, end, end - start, dict(attributes)))
+
+
+def bind(fn: Callable[_P, _T]) -> Callable[_P, _T]:
+    """Wrap a function to run in a copy of the current context, eg. in another thread.
+
+    Spans started by the function are then children of the current span. The returned
+    function must not be called concurrently.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _T:
+        return context.run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def submit(
+    executor: concurrent.futures.Executor,
+    fn: Callable[_P, _T],
+    /,
+    *args: _P.args,
+    **kwargs: _P.kwargs,
+) -> concurrent.futures.Future[_T]:
+    """Submit a call to an executor, to run in a copy of the current context (see :func:`bind`)."""
+    return executor.submit(bind(fn), *args, **kwargs)
+
+
+class PhaseStats:
+    """Aggregated timings of a phase."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.bytes_written = 0
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__name__}(count={self.count}, errors={self.errors}, '
+            f'total={self.total}, min={self.min}, max={self.max}, '
+            f'bytes_written={self.bytes_written})'
+        )
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Collector:
+    """Observer aggregating the timings of each phase.
+
+    It can be used as a context manager, which registers it as an observer for the duration
+    of the ``with`` block, or registered manually with :func:`add_observer`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.phases: dict[str, PhaseStats] = {}
+
+    def __call__(self, event: Event) -> None:
+        if event.kind != 'stop':
+            return
+        assert event.duration is not None
+        with self._lock:
+            stats = self.phases.setdefault(event.phase, PhaseStats())
+            stats.count += 1
+            stats.total += event.duration
+            stats.min = min(stats.min, event.duration)
+            stats.max = max(stats.max, event.duration)
+            stats.bytes_written += event.attributes.get('bytes_written', 0)
+            if 'error' in event.attributes:
+                stats.errors += 1
+
+    def __enter__(self) -> Collector:
+        add_observer(self)
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        remove_observer(self)
+
+    def summary(self) -> str:
+        """Table with the statistics for each phase, sorted by total time."""
+        lines = [f'{"phase":24} {"count":>6} {"total":>10} {"mean":>10} {"max":>10}']
+        with self._lock:
+            phases = sorted(self.phases.items(), key=lambda item: item[1].total, reverse=True)
+            for phase, stats in phases:
+                lines.append(
+                    f'{phase:24} {stats.count:6} {stats.total:9.3f}s '
+                    f'{stats.mean:9.3f}s {stats.max:9.3f}s'
+                )
+        return '\n'.join(lines)
@@ -1,4 +1,8 @@
+import base64
+import functools
+import hashlib
 import pathlib
+import zipfile
 
 import pytest
 
@@ -22,3 +26,36 @@ def example_wheel(packages_path, tmp_path_factory):
 @pytest.fixture
 def venv(tmp_path):
     return environment_helpers.create_venv(tmp_path)
+
+
+def _make_wheel(directory, name, files, version='1.0.0'):
+    """Create a pure wheel with the given {path: contents} files."""
+    dist_info = f'{name}-{version}.dist-info'
+    contents = {
+        **files,
+        f'{dist_info}/METADATA': f'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n',
+        f'{dist_info}/WHEEL': 'Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n',
+    }
+    record = [
+        f'{path},sha256={_record_hash(data)},{len(data.encode())}'
+        for path, data in contents.items()
+    ]
+    record.append(f'{dist_info}/RECORD,,')
+
+    wheel = pathlib.Path(directory, f'{name}-{version}-py3-none-any.whl')
+    with zipfile.ZipFile(wheel, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for path, data in contents.items():
+            zf.writestr(path, data)
+        zf.writestr(f'{dist_info}/RECORD', '\n'.join(record) + '\n')
+    return wheel
+
+
+def _record_hash(data):
+    digest = hashlib.sha256(data.encode()).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip('=')
+
+
+@pytest.fixture
+def make_wheel(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('wheels')
+    return functools.partial(_make_wheel, directory)
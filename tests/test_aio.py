@@ -0,0 +1,121 @@
+import asyncio
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+import environment_helpers
+import environment_helpers.aio
+import environment_helpers.introspect
+
+
+def test_arun(venv):
+    env = environment_helpers.aio.AsyncEnvironment(venv)
+
+    output = asyncio.run(env.arun_interpreter('-c', 'import sys; print(sys.prefix)'))
+
+    assert output.decode().strip() == os.fspath(venv.base)
+
+
+def test_arun_error(venv):
+    env = environment_helpers.aio.AsyncEnvironment(venv)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        asyncio.run(env.arun_interpreter('-c', 'raise SystemExit(1)'))
+
+
+def test_arun_cancel_kills_process(venv, tmp_path):
+    env = environment_helpers.aio.AsyncEnvironment(venv)
+    pid_file = tmp_path / 'pid'
+    code = 'import os, sys, time; open(sys.argv[1], "w").write(str(os.getpid())); time.sleep(60)'
+
+    async def main():
+        task = asyncio.create_task(env.arun_interpreter('-c', code, os.fspath(pid_file)))
+        while not pid_file.is_file() or not pid_file.read_text():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+def test_acall():
+    introspectable = environment_helpers.aio.AsyncIntrospectable(
+        environment_helpers.introspect.Introspectable(sys.executable)
+    )
+
+    assert asyncio.run(introspectable.acall('operator.add', 1, 2)) == 3
+
+
+def test_asnapshot(mocker):
+    introspectable = environment_helpers.introspect.Introspectable(sys.executable)
+    async_introspectable = environment_helpers.aio.AsyncIntrospectable(introspectable)
+    expected = environment_helpers.introspect.Introspectable(sys.executable).snapshot()
+
+    async def main():
+        return await asyncio.gather(
+            async_introspectable.asnapshot(),
+            async_introspectable.aget_scheme(),
+            async_introspectable.aget_launcher_kind(),
+        )
+
+    snapshot, scheme, launcher_kind = asyncio.run(main())
+
+    assert snapshot == expected
+    assert scheme == expected.scheme
+    assert launcher_kind == expected.launcher_kind
+    # the data is shared with the wrapped object
+    mocker.patch.object(introspectable, '_run_script', side_effect=AssertionError)
+    assert introspectable.snapshot() == snapshot
+
+
+def test_ainstall_wheel(venv, example_wheel):
+    env = environment_helpers.aio.AsyncEnvironment(venv)
+
+    asyncio.run(env.ainstall_wheel(example_wheel))
+
+    assert asyncio.run(env.arun_interpreter('-c', 'import example; print(example.__name__)')) == (
+        b'example\n'
+    )
+
+
+@pytest.mark.parametrize('marker', [False, True])
+def test_ainstall_satisfied(venv, make_wheel, mocker, marker):
+    venv.install_wheel(make_wheel('pkg', {'pkg.py': ''}))
+    env = environment_helpers.aio.AsyncEnvironment(venv)
+    aget_marker_environment = mocker.spy(
+        environment_helpers.aio.AsyncIntrospectable, 'aget_marker_environment'
+    )
+    arun = mocker.patch.object(env, 'arun')
+
+    requirement = 'pkg >= 1.0; python_version >= "3"' if marker else 'pkg >= 1.0'
+    asyncio.run(env.ainstall([requirement]))
+
+    arun.assert_not_called()
+    assert aget_marker_environment.call_count == (1 if marker else 0)
+
+
+def test_abuild_wheel(packages_path, tmp_path):
+    wheel = asyncio.run(
+        environment_helpers.aio.abuild_wheel(packages_path / 'example', tmp_path, quiet=True)
+    )
+
+    assert isinstance(wheel, pathlib.Path)
+    assert wheel.is_file()
+
+
+def test_abuild_wheel_error(tmp_path):
+    tmp_path.joinpath('pyproject.toml').write_text(
+        "[build-system]\nrequires = []\nbuild-backend = 'nonexistent_backend'\n"
+    )
+
+    with pytest.raises(Exception, match='nonexistent_backend'):
+        asyncio.run(
+            environment_helpers.aio.abuild_wheel(tmp_path, tmp_path / 'dist', isolated=False)
+        )
@@ -1,6 +1,11 @@
+import os
+import shutil
+import subprocess
+
 import build
 import pytest
 
+import environment_helpers
 import environment_helpers.build
 
 
@@ -32,3 +37,232 @@ def test_build_wheel_via_sdist_fail(packages_path, tmp_path):
     package = packages_path / 'test-cant-build-via-sdist'
     with pytest.raises(build.BuildBackendException):
         environment_helpers.build.build_wheel_via_sdist(package, tmp_path)
+
+
+def test_build_wheel_pool(packages_path, tmp_path, mocker):
+    package = packages_path / 'example'
+    create_venv = mocker.spy(environment_helpers, 'create_venv')
+
+    with environment_helpers.build.BuildEnvironmentPool(tmp_path / 'pool') as pool:
+        environment_helpers.build.build_wheel(package, tmp_path / 'out0', pool=pool)
+        wheel = environment_helpers.build.build_wheel(package, tmp_path / 'out1', pool=pool)
+
+    assert wheel.name == 'example-1.2.3-py2.py3-none-any.whl'
+    assert create_venv.call_count == 1
+
+
+@pytest.fixture
+def pool(tmp_path, mocker):
+    mocker.patch('environment_helpers.Environment.install')
+    with environment_helpers.build.BuildEnvironmentPool(tmp_path, max_environments=2) as pool:
+        yield pool
+
+
+def test_pool_lease_exclusive(pool):
+    with pool.lease(['a']) as env0, pool.lease(['a']) as env1:
+        assert env0.base != env1.base
+    with pool.lease(['A']) as env2:
+        assert env2.base in (env0.base, env1.base)
+
+
+def test_pool_eviction(pool, tmp_path):
+    for requirement in ('a', 'b', 'c'):
+        with pool.lease([requirement]) as env:
+            pass
+
+    assert len(list(tmp_path.glob('*.json'))) == 2
+    assert env.base.is_dir()
+
+
+def test_pool_integrity(pool):
+    with pool.lease(['a']) as env:
+        pass
+    env.interpreter.unlink()
+
+    with pool.lease(['a']) as new_env:
+        assert new_env.interpreter.is_file()
+
+
+def test_pool_reset_error(pool, tmp_path, mocker):
+    reset = mocker.patch.object(pool, '_reset', side_effect=OSError('oops'))
+
+    with pytest.raises(OSError, match='oops'), pool.lease(['a']) as env:
+        pass
+    mocker.stop(reset)
+
+    # the environment is discarded, and can't stay locked
+    assert not env.base.exists()
+    assert list(tmp_path.glob('*.json')) == []
+    with pool.lease(['a']) as new_env:
+        assert new_env.interpreter.is_file()
+
+
+def test_pool_reset(tmp_path, make_wheel, mocker):
+    wheel = make_wheel('a', {'a.py': ''})
+    mocker.patch(
+        'environment_helpers.Environment.install',
+        autospec=True,
+        side_effect=lambda env, requirements: env.install_wheel(wheel),
+    )
+    pool = environment_helpers.build.BuildEnvironmentPool(tmp_path)
+
+    with pool.lease(['a']) as env:
+        env.install_wheel(make_wheel('dynamic', {'dynamic.py': ''}))
+
+    with pool.lease(['a']) as same_env:
+        assert same_env.base == env.base
+        assert same_env.distributions().versions() == {'a': '1.0.0'}
+        same_env.uninstall(['a'])
+
+    # modified in a way that can't be undone
+    with pool.lease(['a']) as new_env:
+        assert new_env.base != env.base
+        assert new_env.distributions().versions() == {'a': '1.0.0'}
+
+
+def test_build_many(packages_path, tmp_path):
+    srcdirs = [packages_path / 'example', packages_path / 'test-cant-build-via-sdist']
+
+    results = {
+        result.srcdir.name: result
+        for result in environment_helpers.build.build_many(
+            srcdirs, tmp_path, via_sdist=True, jobs=2, max_env_creation=1
+        )
+    }
+
+    assert results['example'].wheel == tmp_path / 'example-1.2.3-py2.py3-none-any.whl'
+    assert results['example'].error is None
+    assert results['test-cant-build-via-sdist'].wheel is None
+    assert isinstance(results['test-cant-build-via-sdist'].error, build.BuildException)
+
+
+@pytest.mark.parametrize('keep_sdist', [True, False])
+def test_build_wheel_via_sdist_single_env(packages_path, tmp_path, mocker, keep_sdist):
+    create_venv = mocker.spy(environment_helpers, 'create_venv')
+
+    wheel = environment_helpers.build.build_wheel_via_sdist(
+        packages_path / 'example', tmp_path, keep_sdist=keep_sdist
+    )
+
+    assert wheel == tmp_path / 'example-1.2.3-py2.py3-none-any.whl'
+    assert tmp_path.joinpath('example-1.2.3.tar.gz').is_file() == keep_sdist
+    assert create_venv.call_count == 1
+
+
+def test_build_wheel_quiet_fail_output(tmp_path):
+    srcdir = tmp_path / 'project'
+    srcdir.mkdir()
+    srcdir.joinpath('pyproject.toml').write_text(
+        "[build-system]\nbuild-backend = 'verbose_backend'\nbackend-path = ['.']\nrequires = []\n"
+    )
+    srcdir.joinpath('verbose_backend.py').write_text(
+        'import sys\n'
+        'def build_wheel(*args, **kwargs):\n'
+        '    for i in range(100_000):\n'
+        "        print(f'compiling file {i}')\n"
+        "    print('the actual error', file=sys.stderr)\n"
+        "    raise RuntimeError('failed')\n"
+    )
+
+    with pytest.raises(build.BuildBackendException) as exc_info:
+        environment_helpers.build.build_wheel(srcdir, tmp_path / 'dist', quiet=True)
+
+    output = exc_info.value.exception.output
+    assert len(output) <= environment_helpers.build._QUIET_OUTPUT_TAIL
+    assert b'the actual error' in output
+    assert b'compiling file 0\n' not in output
+
+    error = environment_helpers.build._portable_exception(exc_info.value)
+    assert isinstance(error, build.BuildException)
+    assert 'the actual error' in str(error)
+
+
+def test_build_wheel_cache(packages_path, tmp_path, mocker):
+    srcdir = tmp_path / 'example'
+    shutil.copytree(packages_path / 'example', srcdir)
+    builder = mocker.spy(environment_helpers.build, '_builder')
+    cache = environment_helpers.build.WheelCache(tmp_path / 'cache')
+
+    wheel0 = environment_helpers.build.build_wheel(srcdir, tmp_path / 'out0', cache=cache)
+    wheel1 = environment_helpers.build.build_wheel(srcdir, tmp_path / 'out1', cache=cache)
+
+    assert wheel1 == tmp_path / 'out1' / 'example-1.2.3-py2.py3-none-any.whl'
+    assert wheel1.read_bytes() == wheel0.read_bytes()
+    assert builder.call_count == 1
+
+    environment_helpers.build.build_wheel_via_sdist(srcdir, tmp_path / 'out2', cache=cache)
+    assert builder.call_count == 2
+
+    with srcdir.joinpath('example.py').open('a') as f:
+        f.write('# changed\n')
+    environment_helpers.build.build_wheel(srcdir, tmp_path / 'out3', cache=cache)
+    assert builder.call_count == 3
+
+
+def _write_tree(path, files):
+    for name, contents in files.items():
+        path.joinpath(name).parent.mkdir(parents=True, exist_ok=True)
+        path.joinpath(name).write_text(contents)
+
+
+@pytest.mark.parametrize('hash_contents', [False, True])
+def test_source_fingerprint(tmp_path, hash_contents):
+    _write_tree(tmp_path, {'pyproject.toml': '', 'src/module.py': 'a = 1\n'})
+    fingerprint = environment_helpers.build.source_fingerprint(tmp_path, hash_contents)
+
+    _write_tree(tmp_path, {'src/__pycache__/module.pyc': '', 'dist/project.whl': ''})
+    assert environment_helpers.build.source_fingerprint(tmp_path, hash_contents) == fingerprint
+
+    stat = tmp_path.joinpath('src/module.py').stat()
+    os.utime(tmp_path / 'src' / 'module.py', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    touched = environment_helpers.build.source_fingerprint(tmp_path, hash_contents)
+    assert (touched == fingerprint) == hash_contents
+
+    _write_tree(tmp_path, {'src/module.py': 'a = 2\n'})
+    assert environment_helpers.build.source_fingerprint(tmp_path, hash_contents) != fingerprint
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_source_fingerprint_git(tmp_path):
+    subprocess.run(['git', 'init', '-q'], cwd=tmp_path, check=True)
+    _write_tree(tmp_path, {'.gitignore': '*.log\n', 'module.py': ''})
+    fingerprint = environment_helpers.build.source_fingerprint(tmp_path)
+
+    _write_tree(tmp_path, {'output.log': ''})
+    assert environment_helpers.build.source_fingerprint(tmp_path) == fingerprint
+
+    _write_tree(tmp_path, {'other.py': ''})
+    assert environment_helpers.build.source_fingerprint(tmp_path) != fingerprint
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_wheel_cache_key_git_ignored(tmp_path):
+    subprocess.run(['git', 'init', '-q'], cwd=tmp_path, check=True)
+    project = tmp_path / 'ignored' / 'project'
+    _write_tree(
+        tmp_path,
+        {
+            '.gitignore': 'ignored/\n',
+            'ignored/project/pyproject.toml': '[build-system]\nrequires = ["flit-core"]\n',
+            'ignored/project/module.py': 'a = 1\n',
+        },
+    )
+    cache = environment_helpers.build.WheelCache(tmp_path / 'cache', hash_contents=True)
+    key = cache.key(project)
+
+    _write_tree(project, {'module.py': 'a = 2\n'})
+    assert cache.key(project) != key
+
+
+def test_wheel_cache_eviction(tmp_path):
+    cache = environment_helpers.build.WheelCache(tmp_path / 'cache', max_entries=2)
+    wheel = tmp_path / 'project-1.0.0-py3-none-any.whl'
+    wheel.write_bytes(b'wheel')
+
+    for key in ('a', 'b', 'c'):
+        cache.put(key, wheel)
+        os.utime(tmp_path / 'cache' / key, (0, {'a': 1, 'b': 2, 'c': 3}[key]))
+
+    assert cache.get('a', tmp_path / 'out') is None
+    assert cache.get('c', tmp_path / 'out') == tmp_path / 'out' / wheel.name
+    assert tmp_path.joinpath('out', wheel.name).read_bytes() == b'wheel'
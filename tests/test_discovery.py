@@ -0,0 +1,176 @@
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+import environment_helpers
+import environment_helpers.discovery
+import environment_helpers.introspect
+
+
+def _interpreter(path, version, implementation='cpython'):
+    return environment_helpers.discovery.Interpreter(
+        path=pathlib.Path(path),
+        implementation=implementation,
+        version=environment_helpers.introspect.PythonVersion(*version),
+        launcher_kind='posix',
+        scheme={},
+        system_scheme={},
+    )
+
+
+@pytest.fixture
+def registry():
+    return environment_helpers.discovery.InterpreterRegistry(
+        [
+            _interpreter('/usr/bin/python3.11', (3, 11, 9, 'final', 0)),
+            _interpreter('/usr/bin/python3.13', (3, 13, 0, 'candidate', 1)),
+            _interpreter('/usr/bin/pypy3.10', (3, 10, 14, 'final', 0), 'pypy'),
+            _interpreter('/usr/bin/python3.12', (3, 12, 1, 'final', 0)),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    ('constraint', 'implementation', 'expected'),
+    [
+        (None, None, 'python3.13'),
+        ('3.12', None, 'python3.12'),
+        ('3', None, 'python3.13'),
+        ('>=3.11,<3.13', None, 'python3.12'),
+        ('<3.11', None, 'pypy3.10'),
+        (None, 'PyPy', 'pypy3.10'),
+        ('3.11', 'pypy', None),
+        ('>=3.14', None, None),
+    ],
+)
+def test_registry_find(registry, constraint, implementation, expected):
+    interpreter = registry.find(constraint, implementation)
+
+    assert (interpreter and interpreter.path.name) == expected
+
+
+def test_registry_select(registry):
+    assert [interpreter.path.name for interpreter in registry.select('>=3.11')] == [
+        'python3.13',
+        'python3.12',
+        'python3.11',
+    ]
+
+
+def test_find_candidates(venv, tmp_path):
+    other = tmp_path / 'other' / 'bin'
+    other.mkdir(parents=True)
+    other.joinpath('python3').write_text('')
+    other.joinpath('python3-config').write_text('')
+    for path in other.iterdir():
+        path.chmod(0o644)
+
+    candidates = environment_helpers.discovery.find_candidates(
+        [venv.base, tmp_path / 'other'], path=False, common=False
+    )
+
+    assert candidates == [venv.interpreter]
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='symlinks need privileges on Windows')
+def test_find_candidates_links(tmp_path):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    real = bin_dir / 'python3.12'
+    real.write_text('')
+    real.chmod(0o755)
+    bin_dir.joinpath('python3').symlink_to(real)
+    os.link(real, bin_dir / 'python')
+
+    candidates = environment_helpers.discovery.find_candidates([tmp_path], path=False, common=False)
+
+    assert candidates == [bin_dir / 'python']
+
+
+@pytest.mark.parametrize('cache', [False, True])
+def test_discover(venv, tmp_path, monkeypatch, cache):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', os.fspath(tmp_path / 'cache'))
+    broken = tmp_path / 'broken'
+    broken.mkdir()
+    broken.joinpath('python3').write_bytes(b'\0' * 16)
+    broken.joinpath('python3').chmod(0o755)
+
+    registry = environment_helpers.discovery.discover(
+        [venv.base, broken], path=False, common=False, cache=cache
+    )
+
+    assert [interpreter.path for interpreter in registry] == [venv.interpreter]
+    interpreter = registry.find(f'{sys.version_info.major}.{sys.version_info.minor}')
+    assert interpreter.version == tuple(sys.version_info)
+    assert interpreter.implementation == sys.implementation.name
+    assert interpreter.scheme == venv.scheme
+
+
+def test_discover_cached_failure(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', os.fspath(tmp_path / 'cache'))
+    broken = tmp_path / 'bin' / 'python3'
+    broken.parent.mkdir()
+    broken.write_bytes(b'\0' * 16)
+    broken.chmod(0o755)
+    get_introspectable = mocker.spy(environment_helpers.introspect, 'get_introspectable')
+
+    for _ in range(2):
+        registry = environment_helpers.discovery.discover([tmp_path], path=False, common=False)
+        assert len(registry) == 0
+    assert get_introspectable.call_count == 1
+
+    # failures are specific to the version of the introspection code
+    monkeypatch.setattr(environment_helpers, '__version__', '0.0.0')
+    environment_helpers.discovery.discover([tmp_path], path=False, common=False)
+    assert get_introspectable.call_count == 2
+
+    # and expire
+    os.utime(environment_helpers.discovery._failure_marker(broken), (0, 0))
+    environment_helpers.discovery.discover([tmp_path], path=False, common=False)
+    assert get_introspectable.call_count == 3
+
+
+def test_discover_removed(venv, tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', os.fspath(tmp_path / 'cache'))
+    removed = tmp_path / 'removed' / 'python3'
+    mocker.patch.object(
+        environment_helpers.discovery,
+        'find_candidates',
+        return_value=[removed, venv.interpreter],
+    )
+
+    registry = environment_helpers.discovery.discover([], path=False, common=False)
+
+    assert [interpreter.path for interpreter in registry] == [venv.interpreter]
+
+
+def test_discover_timeout(tmp_path, monkeypatch, mocker):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', os.fspath(tmp_path / 'cache'))
+    snapshot = mocker.patch(
+        'environment_helpers.introspect.Introspectable.snapshot',
+        side_effect=subprocess.TimeoutExpired('python', 1),
+    )
+
+    for _ in range(2):
+        registry = environment_helpers.discovery.discover(
+            [pathlib.Path(sys.executable).parent], path=False, common=False, timeout=1
+        )
+        assert len(registry) == 0
+    # timeouts may be transient, so they aren't remembered
+    assert snapshot.call_count == 2 * len(
+        environment_helpers.discovery.find_candidates(
+            [pathlib.Path(sys.executable).parent], path=False, common=False
+        )
+    )
+    snapshot.assert_called_with(timeout=1)
+
+
+def test_find_candidates_wrapper_script(tmp_path):
+    script = tmp_path / 'python3'
+    script.write_text(f'#!/bin/sh\nexec {sys.executable} "$@"\n')
+    script.chmod(0o755)
+
+    assert environment_helpers.discovery.find_candidates([tmp_path], path=False, common=False) == []
@@ -0,0 +1,128 @@
+import os
+import pathlib
+import sys
+
+import packaging.markers
+import pytest
+
+import environment_helpers
+import environment_helpers.distributions
+
+
+@pytest.fixture
+def installed(venv, make_wheel):
+    venv.install_wheel(make_wheel('Some_Package', {'some_package.py': ''}, version='1.2.0'))
+    venv.install_wheel(make_wheel('other', {'other.py': ''}, version='2.0.0rc1'))
+    return venv
+
+
+def test_installed_versions(installed):
+    versions = environment_helpers.distributions.installed_versions(
+        [installed.scheme['purelib'], installed.scheme['platlib']]
+    )
+
+    assert versions == {'some-package': '1.2.0', 'other': '2.0.0rc1'}
+
+
+@pytest.mark.parametrize(
+    ('requirements', 'expected'),
+    [
+        ([], True),
+        (['some-package'], True),
+        (['Some.Package >= 1', 'other'], True),
+        (['some_package < 1'], False),
+        (['other >= 2.0.0rc1'], True),
+        (['missing'], False),
+        (['missing; python_version < "3"'], True),
+        ([f'some-package; sys_platform == "{sys.platform}"'], True),
+        ([f'missing; sys_platform == "{sys.platform}"'], False),
+        (['some-package[extra]'], False),
+        (['some-package @ https://example.com/some_package.whl'], False),
+        (['./some/path'], False),
+    ],
+)
+def test_requirements_satisfied(requirements, expected):
+    versions = {'some-package': '1.2.0', 'other': '2.0.0rc1'}
+
+    assert (
+        environment_helpers.distributions.requirements_satisfied(
+            requirements, versions, packaging.markers.default_environment
+        )
+        is expected
+    )
+
+
+def test_requirements_satisfied_markers_lazy():
+    def marker_environment():
+        raise AssertionError
+
+    assert environment_helpers.distributions.requirements_satisfied(
+        ['some-package'], {'some-package': '1.0'}, marker_environment
+    )
+
+
+def test_install_satisfied(installed, mocker):
+    run = mocker.patch('environment_helpers.Environment.run')
+
+    installed.install(['some-package >= 1', 'other; os_name != "unknown"'])
+    run.assert_not_called()
+
+    installed.install(['some-package >= 2'])
+    run.assert_called_once()
+
+
+def test_marker_environment(venv):
+    assert venv.introspectable.get_marker_environment() == packaging.markers.default_environment()
+    assert venv.introspectable.snapshot().marker_environment == (
+        packaging.markers.default_environment()
+    )
+
+
+def test_distribution_index(installed, make_wheel):
+    index = installed.distributions()
+    purelib = pathlib.Path(installed.scheme['purelib'])
+
+    assert installed.distributions() is index
+    assert sorted(dist.name for dist in index) == ['other', 'some-package']
+    assert 'Some.Package' in index
+    assert index.get('SOME_PACKAGE').version == '1.2.0'
+    assert index.get('other').metadata['Version'] == '2.0.0rc1'
+    assert index.get('missing') is None
+    assert index.owner(purelib / 'some_package.py').name == 'some-package'
+    assert index.owner(purelib / 'unknown.py') is None
+
+    installed.install_wheel(
+        make_wheel(
+            'plugin',
+            {
+                'plugin.py': '',
+                'plugin-1.0.0.dist-info/entry_points.txt': '[example.plugins]\nfoo = plugin:Foo\n',
+            },
+        )
+    )
+    assert index.versions() == {'some-package': '1.2.0', 'other': '2.0.0rc1', 'plugin': '1.0.0'}
+    assert index.owner(purelib / 'plugin.py').name == 'plugin'
+    assert list(index.entry_points('example.plugins')) == [
+        environment_helpers.distributions.EntryPoint(
+            'foo', 'example.plugins', 'plugin:Foo', 'plugin'
+        )
+    ]
+    assert list(index.entry_points('other.group')) == []
+
+
+def test_distribution_index_invalidation(tmp_path, mocker):
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    for path, version in ((first, '1.0'), (second, '2.0')):
+        path.joinpath(f'pkg-{version}.dist-info').mkdir(parents=True)
+        os.utime(path, (0, 0))
+    index = environment_helpers.distributions.DistributionIndex([first, second])
+    scan = mocker.spy(index, '_scan')
+
+    assert index.versions() == {'pkg': '1.0'}
+    assert index.versions() == {'pkg': '1.0'}
+    assert scan.call_count == 2
+
+    first.joinpath('pkg-1.0.dist-info').rmdir()
+    first.joinpath('other-3.0.dist-info').mkdir()
+    assert index.versions() == {'pkg': '2.0', 'other': '3.0'}
+    assert scan.call_count == 3
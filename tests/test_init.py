@@ -1,6 +1,9 @@
+import json
 import os
 import re
+import shutil
 import subprocess
+import sys
 
 import pytest
 
@@ -143,3 +146,243 @@ def test_environment_install_no_default_method(venv, mocker):
 
     with pytest.raises(ValueError, match=re.escape('No valid install method found.')):
         venv.install(['requirement0'])
+
+
+def _venv_files(env):
+    return {
+        path.relative_to(env.base)
+        for path in env.base.rglob('*')
+        if '__pycache__' not in path.parts
+    }
+
+
+@pytest.mark.parametrize('with_pip', [False, True])
+def test_create_venv_template(tmp_path, monkeypatch, with_pip):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', os.fspath(tmp_path / 'cache'))
+
+    fresh = environment_helpers.create_venv(tmp_path / 'fresh', with_pip=with_pip)
+    env = environment_helpers.create_venv(tmp_path / 'env', template=True, with_pip=with_pip)
+    clone = environment_helpers.create_venv(tmp_path / 'clone', template=True, with_pip=with_pip)
+
+    assert len(list(tmp_path.joinpath('cache', 'venv-templates').glob('*.json'))) == 1
+    for new in (env, clone):
+        assert _venv_files(new) == _venv_files(fresh)
+        assert new.base.joinpath('pyvenv.cfg').read_text() == (
+            fresh.base.joinpath('pyvenv.cfg').read_text().replace('fresh', new.base.name)
+        )
+        activate = 'activate.bat' if os.name == 'nt' else 'activate'
+        assert new.scripts.joinpath(activate).read_text() == (
+            fresh.scripts.joinpath(activate).read_text().replace('fresh', new.base.name)
+        )
+        if with_pip:
+            assert os.fspath(new.base) in new.run_interpreter('-m', 'pip', '--version').decode()
+
+
+def test_create_venv_template_removed(tmp_path, monkeypatch):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', os.fspath(tmp_path / 'cache'))
+    templates = tmp_path / 'cache' / 'venv-templates'
+
+    environment_helpers.create_venv(tmp_path / 'env0', template=True)
+    [template] = [path for path in templates.iterdir() if path.is_dir()]
+    shutil.rmtree(template)
+
+    env = environment_helpers.create_venv(tmp_path / 'env1', template=True)
+    assert env.interpreter.is_file()
+    assert len([path for path in templates.iterdir() if path.is_dir()]) == 1
+
+
+def test_create_venv_template_stale(tmp_path, monkeypatch):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', os.fspath(tmp_path / 'cache'))
+    templates = tmp_path / 'cache' / 'venv-templates'
+    interpreter = tmp_path / 'python'
+    interpreter.write_bytes(b'')
+    identity = environment_helpers.introspect._interpreter_identity(interpreter)
+    stale = templates / 'stale'
+    stale.mkdir(parents=True)
+    templates.joinpath('stale.json').write_text(
+        json.dumps({'path': os.fspath(stale), 'cloneable': True, 'interpreter': identity})
+    )
+    interpreter.write_bytes(b'modified')
+
+    environment_helpers.create_venv(tmp_path / 'env', template=True)
+
+    assert not stale.exists()
+    assert not templates.joinpath('stale.json').exists()
+    assert len(list(templates.glob('*.json'))) == 1
+
+
+def test_run_streaming(venv):
+    code = 'for i in range(3): print(i, flush=True)'
+
+    assert list(venv.run_interpreter_streaming('-c', code)) == [b'0\n', b'1\n', b'2\n']
+    assert b''.join(venv.run_interpreter_streaming('-c', code, chunk_size=1)) == b'0\n1\n2\n'
+
+
+def test_run_streaming_error(venv):
+    code = (
+        'import sys\nfor i in range(1000): print(i)\nprint("error", file=sys.stderr)\nsys.exit(3)\n'
+    )
+    lines = []
+
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        lines.extend(venv.run_interpreter_streaming('-c', code, tail=8, stderr=subprocess.PIPE))
+
+    assert len(lines) == 1000
+    assert exc_info.value.returncode == 3
+    assert exc_info.value.output == b'998\n999\n'
+    assert exc_info.value.stderr == b'error\n'
+
+
+def test_run_streaming_stderr(venv):
+    code = 'import sys; print("out"); print("err", file=sys.stderr)'
+    stderr = []
+
+    assert list(venv.run_interpreter_streaming('-c', code, stderr=stderr.append)) == [b'out\n']
+    assert stderr == [b'err\n']
+    assert sorted(venv.run_interpreter_streaming('-c', code, stderr=subprocess.STDOUT)) == [
+        b'err\n',
+        b'out\n',
+    ]
+
+
+def test_run_streaming_stopped(venv):
+    lines = venv.run_interpreter_streaming('-c', 'while True: print("y", flush=True)')
+
+    assert next(lines) == b'y\n'
+    lines.close()
+
+
+def _imported_modules(code):
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    return {
+        line.rsplit('|', maxsplit=1)[-1].strip()
+        for line in output.splitlines()
+        if line.startswith('import time:')
+    }
+
+
+@pytest.mark.parametrize(
+    ('code', 'unexpected'),
+    [
+        (
+            'import environment_helpers',
+            {
+                'environment_helpers.build',
+                'environment_helpers.install',
+                'environment_helpers.introspect',
+                'build',
+                'installer',
+                'packaging',
+                'venv',
+                'tarfile',
+                'pickle',
+                'subprocess',
+                'asyncio',
+                'multiprocessing',
+            },
+        ),
+        (
+            'import environment_helpers; environment_helpers.CurrentEnvironment().scheme',
+            {
+                'environment_helpers.install',
+                'environment_helpers.introspect',
+                'build',
+                'installer',
+                'packaging',
+                'venv',
+                'tarfile',
+                'pickle',
+                'subprocess',
+                'asyncio',
+                'multiprocessing',
+            },
+        ),
+    ],
+)
+def test_import_time(code, unexpected):
+    assert _imported_modules(code) & unexpected == set()
+
+
+def test_lazy_submodules():
+    assert environment_helpers.build.__name__ == 'environment_helpers.build'
+
+    with pytest.raises(AttributeError):
+        environment_helpers.does_not_exist
+
+
+def test_uninstall(venv, make_wheel):
+    wheel = make_wheel(
+        'pkg',
+        {
+            'pkg/__init__.py': '',
+            'pkg/sub/module.py': '',
+            'pkg-1.0.0.data/scripts/pkg-script': '#!python\nprint(1)\n',
+        },
+    )
+    venv.install_wheel(wheel)
+    venv.install_wheel(make_wheel('other', {'other.py': ''}))
+    venv.run_interpreter('-c', 'import pkg.sub.module')
+    purelib = venv.scheme['purelib']
+
+    venv.uninstall(['PKG', 'missing'])
+
+    assert not purelib.joinpath('pkg').exists()
+    assert not purelib.joinpath('pkg-1.0.0.dist-info').exists()
+    assert not venv.scripts.joinpath('pkg-script').exists()
+    assert purelib.joinpath('other.py').is_file()
+    assert venv.distributions().versions() == {'other': '1.0.0'}
+
+
+def test_uninstall_outside_environment(venv, make_wheel, tmp_path_factory):
+    venv.install_wheel(make_wheel('pkg', {'pkg.py': ''}))
+    # a scheme path outside of the environment, like stdlib or include in virtual environments
+    include = tmp_path_factory.mktemp('include')
+    include.joinpath('header.h').write_text('')
+    venv._scheme = {**venv.scheme, 'include': include}
+    record = venv.scheme['purelib'] / 'pkg-1.0.0.dist-info' / 'RECORD'
+    escape = os.path.relpath(include / 'header.h', venv.scheme['purelib'])
+    record.write_text(record.read_text() + f'{escape},,\n')
+
+    venv.uninstall(['pkg'])
+
+    assert include.joinpath('header.h').is_file()
+    assert not venv.scheme['purelib'].joinpath('pkg.py').exists()
+
+
+def _tree(path):
+    return {
+        os.fspath(file.relative_to(path)): file.read_bytes() if file.is_file() else None
+        for file in path.rglob('*')
+    }
+
+
+def test_snapshot_restore(venv, make_wheel):
+    venv.install_wheel(make_wheel('base', {'base.py': 'value = 1\n'}))
+    before = _tree(venv.base)
+    purelib = venv.scheme['purelib']
+
+    with venv.snapshot() as snapshot:
+        for _ in range(2):
+            venv.install_wheel(make_wheel('pkg', {'pkg/__init__.py': ''}))
+            venv.uninstall(['base'])
+            venv.base.joinpath('pyvenv.cfg').unlink()
+            purelib.joinpath('pkg', 'new.py').write_text('')
+            venv.restore(snapshot)
+
+            assert _tree(venv.base) == before
+            assert venv.distributions().versions() == {'base': '1.0.0'}
+            venv.run_interpreter('-c', 'import base')
+
+    assert not list(venv.base.parent.glob(f'.{venv.base.name}-snapshot-*'))
+
+
+def test_restore_other_environment(venv, tmp_path):
+    other = environment_helpers.create_venv(tmp_path / 'other')
+
+    with venv.snapshot() as snapshot, pytest.raises(ValueError, match='different environment'):
+        other.restore(snapshot)
@@ -1,7 +1,15 @@
+import json
+import os
 import pathlib
+import shutil
+import sys
+
+import pytest
 
 import environment_helpers
+import environment_helpers._utils
 import environment_helpers.install
+import environment_helpers.introspect
 
 
 def test_install_wheel(example_wheel, venv):
@@ -14,3 +22,136 @@ def test_install_wheel(example_wheel, venv):
 
     assert purelib.joinpath('example.py').is_file()
     assert purelib.joinpath('example-1.2.3.dist-info').is_dir()
+
+
+def test_install_wheel_reuses_introspection(example_wheel, venv, mocker, tmp_path):
+    other_venv = environment_helpers.create_venv(tmp_path / 'other')
+    run_script = mocker.spy(environment_helpers.introspect.Introspectable, '_run_script')
+
+    environment_helpers.install.install_wheel(example_wheel, venv.interpreter)
+    environment_helpers.install.install_wheel(example_wheel, other_venv.interpreter)
+    assert run_script.call_count == 2
+
+    purelib = pathlib.Path(venv.scheme['purelib'])
+    purelib.joinpath('example.py').unlink()
+    shutil.rmtree(purelib / 'example-1.2.3.dist-info')
+    environment_helpers.install.install_wheel(example_wheel, venv.interpreter)
+    assert run_script.call_count == 2
+
+
+def test_install_wheels(make_wheel, venv, mocker):
+    wheels = [make_wheel(f'pkg{i}', {f'pkg{i}/__init__.py': f'value = {i}\n'}) for i in range(10)]
+    run_script = mocker.spy(environment_helpers.introspect.Introspectable, '_run_script')
+
+    venv.install_wheels(wheels, jobs=4)
+
+    assert run_script.call_count == 1
+    purelib = pathlib.Path(venv.scheme['purelib'])
+    for i in range(10):
+        assert purelib.joinpath(f'pkg{i}', '__init__.py').read_text() == f'value = {i}\n'
+        assert purelib.joinpath(f'pkg{i}-1.0.0.dist-info', 'RECORD').is_file()
+
+
+def test_install_wheels_overlap(make_wheel, venv):
+    wheels = [
+        make_wheel('pkg0', {'shared/module.py': ''}),
+        make_wheel('pkg1', {'shared/module.py': ''}),
+    ]
+
+    with pytest.raises(ValueError, match='both install'):
+        venv.install_wheels(wheels)
+
+    assert not pathlib.Path(venv.scheme['purelib'], 'shared', 'module.py').exists()
+
+
+def test_install_wheel_store(make_wheel, venv, tmp_path, mocker):
+    wheel = make_wheel(
+        'pkg',
+        {
+            'pkg/__init__.py': 'value = 1\n',
+            'pkg-1.0.0.data/scripts/pkg-script': '#!python\nprint(1)\n',
+        },
+    )
+    store = environment_helpers.install.WheelStore(tmp_path / 'store')
+    other_venv = environment_helpers.create_venv(tmp_path / 'other')
+    clone_file = mocker.spy(environment_helpers._utils, 'clone_file')
+
+    venv.install_wheel(wheel, store=store)
+    other_venv.install_wheels([wheel], store=store)
+
+    assert len(list(tmp_path.joinpath('store').iterdir())) == 1
+    manifest = json.loads(store.unpack(wheel).joinpath('manifest.json').read_text())
+    assert set(manifest) == {
+        'purelib/pkg/__init__.py',
+        'scripts/pkg-script',
+        'purelib/pkg-1.0.0.dist-info/METADATA',
+        'purelib/pkg-1.0.0.dist-info/WHEEL',
+        'purelib/pkg-1.0.0.dist-info/RECORD',
+    }
+    unpacked = store.unpack(wheel) / 'files' / 'purelib' / 'pkg' / '__init__.py'
+    for env in (venv, other_venv):
+        purelib = pathlib.Path(env.scheme['purelib'])
+        installed = purelib / 'pkg' / '__init__.py'
+        assert installed.read_text() == 'value = 1\n'
+        assert mocker.call(unpacked, installed) in clone_file.mock_calls
+        # scripts and RECORD are generated for each environment
+        script = env.scripts / 'pkg-script'
+        assert os.fspath(env.interpreter) in script.read_text().splitlines()[0]
+        record = purelib.joinpath('pkg-1.0.0.dist-info', 'RECORD').read_text()
+        assert 'pkg/__init__.py,sha256=' in record
+
+
+def test_wheel_store_path_traversal(make_wheel, tmp_path):
+    wheel = make_wheel('pkg', {'pkg/__init__.py': '', '../../../escaped.txt': ''})
+    store = environment_helpers.install.WheelStore(tmp_path / 'a' / 'b' / 'store')
+
+    with pytest.raises(ValueError, match='outside of the target directory'):
+        store.unpack(wheel)
+
+    assert not list(tmp_path.rglob('escaped.txt'))
+    assert not list(store._path.iterdir())
+
+
+def _record_paths(env, dist_info):
+    record = pathlib.Path(env.scheme['purelib'], dist_info, 'RECORD').read_text()
+    return {line.split(',')[0]: line.split(',')[1] for line in record.splitlines()}
+
+
+def test_install_wheel_bytecode(make_wheel, venv):
+    wheel = make_wheel(
+        'pkg', {'pkg/__init__.py': '', 'pkg/module.py': 'value = 1\n', 'pkg/broken.py': 'def'}
+    )
+    tag = sys.implementation.cache_tag
+
+    venv.install_wheel(wheel, optimization_levels=[0, 1])
+
+    purelib = pathlib.Path(venv.scheme['purelib'])
+    record = _record_paths(venv, 'pkg-1.0.0.dist-info')
+    for name in ('__init__', 'module'):
+        for cfile in (f'{name}.{tag}.pyc', f'{name}.{tag}.opt-1.pyc'):
+            assert purelib.joinpath('pkg', '__pycache__', cfile).is_file()
+            assert record[f'pkg/__pycache__/{cfile}'].startswith('sha256=')
+    assert not any('broken' in path for path in record if path.endswith('.pyc'))
+    output = venv.run_interpreter('-c', 'import pkg.module; print(pkg.module.__cached__)')
+    assert output.decode().strip() == os.fspath(
+        purelib / 'pkg' / '__pycache__' / f'module.{tag}.pyc'
+    )
+
+
+def test_install_wheel_bytecode_pool(make_wheel, venv):
+    wheel = make_wheel('pkg', {f'pkg/module{i}.py': f'value = {i}\n' for i in range(50)})
+
+    venv.install_wheel(wheel, optimization_levels=[0])
+
+    record = _record_paths(venv, 'pkg-1.0.0.dist-info')
+    assert len([path for path in record if path.endswith('.pyc')]) == 50
+
+
+def test_install_wheels_bytecode(make_wheel, venv):
+    wheels = [make_wheel(f'pkg{i}', {f'pkg{i}.py': ''}) for i in range(2)]
+
+    venv.install_wheels(wheels, optimization_levels=[0])
+
+    for i in range(2):
+        record = _record_paths(venv, f'pkg{i}-1.0.0.dist-info')
+        assert f'__pycache__/pkg{i}.{sys.implementation.cache_tag}.pyc' in record
@@ -0,0 +1,334 @@
+import concurrent.futures
+import errno
+import os
+import pathlib
+import subprocess
+import sys
+import sysconfig
+import tempfile
+
+import pytest
+
+import environment_helpers.introspect
+
+
+@pytest.fixture
+def worker_introspectable():
+    with environment_helpers.introspect.Introspectable(sys.executable, worker=True) as obj:
+        yield obj
+
+
+def test_worker_call(worker_introspectable):
+    pid = worker_introspectable.call('os.getpid')
+
+    assert worker_introspectable.call('os.getpid') == pid
+    assert worker_introspectable.call('operator.add', 1, 2) == 3
+    assert worker_introspectable.call('builtins.print', 'not part of the reply') is None
+
+
+def test_worker_scripts(worker_introspectable):
+    introspectable = environment_helpers.introspect.Introspectable(sys.executable)
+
+    assert worker_introspectable.get_version() == introspectable.get_version()
+    assert worker_introspectable.get_scheme() == introspectable.get_scheme()
+    assert worker_introspectable.get_system_scheme() == introspectable.get_system_scheme()
+    assert worker_introspectable.get_launcher_kind() == introspectable.get_launcher_kind()
+
+
+def test_worker_call_exception(worker_introspectable):
+    with pytest.raises(environment_helpers.introspect.CallError, match='ValueError') as exc_info:
+        worker_introspectable.call('math.sqrt', -1)
+
+    assert isinstance(exc_info.value.__cause__, ValueError)
+    assert 'Traceback' in exc_info.value.traceback
+
+
+def test_worker_call_exception_unavailable(venv):
+    # The exception class only exists in the target environment
+    venv.scheme['purelib'].joinpath('venv_only.py').write_text(
+        'class VenvOnlyError(Exception):\n'
+        '    pass\n'
+        'def fail():\n'
+        '    raise VenvOnlyError("failed")\n'
+    )
+
+    with environment_helpers.introspect.Introspectable(venv.interpreter, worker=True) as obj:
+        with pytest.raises(environment_helpers.introspect.CallError, match='VenvOnlyError') as exc:
+            obj.call('venv_only.fail')
+        assert exc.value.__cause__ is None
+
+        results = obj.call_many([('venv_only.fail', (), {}), ('operator.add', (1, 2), {})])
+        assert isinstance(results[0], environment_helpers.introspect.CallError)
+        assert results[1] == 3
+
+
+def test_worker_restart(worker_introspectable):
+    pid = worker_introspectable.call('os.getpid')
+
+    with pytest.raises(subprocess.CalledProcessError):
+        worker_introspectable.call('os._exit', 1)
+
+    assert worker_introspectable.call('os.getpid') != pid
+
+
+def test_worker_close():
+    with environment_helpers.introspect.Introspectable(sys.executable, worker=True) as obj:
+        obj.call('os.getpid')
+        process = obj._worker._process
+
+    assert process.returncode == 0
+
+
+@pytest.mark.parametrize('worker', [False, True])
+def test_snapshot(mocker, worker):
+    with environment_helpers.introspect.Introspectable(sys.executable, worker=worker) as obj:
+        expected = environment_helpers.introspect.Introspectable(sys.executable)
+
+        snapshot = obj.snapshot()
+
+        assert snapshot.version == expected.get_version()
+        assert snapshot.scheme == expected.get_scheme()
+        assert snapshot.system_scheme == expected.get_system_scheme()
+        assert snapshot.launcher_kind == expected.get_launcher_kind()
+
+        # the per-method caches were filled
+        mocker.patch.object(obj, '_run_script', side_effect=AssertionError)
+        assert obj.snapshot() == snapshot
+        assert obj.get_version() == snapshot.version
+        assert obj.get_scheme() == snapshot.scheme
+        assert obj.get_system_scheme() == snapshot.system_scheme
+        assert obj.get_launcher_kind() == snapshot.launcher_kind
+
+
+def test_snapshot_copies():
+    introspectable = environment_helpers.introspect.Introspectable(sys.executable)
+    snapshot = introspectable.snapshot()
+
+    # modifying the results doesn't affect the cached data
+    snapshot.scheme.clear()
+    snapshot.marker_environment.clear()
+    introspectable.get_system_scheme().clear()
+
+    assert introspectable.snapshot().scheme == introspectable.get_scheme() != {}
+    assert introspectable.snapshot().marker_environment != {}
+    assert introspectable.get_system_scheme() != {}
+
+
+def test_snapshot_timeout():
+    introspectable = environment_helpers.introspect.Introspectable(sys.executable)
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        introspectable.snapshot(timeout=0.001)
+
+
+def test_get_scheme_name():
+    introspectable = environment_helpers.introspect.Introspectable(sys.executable)
+
+    assert introspectable.get_scheme('posix_user' if os.name == 'posix' else 'nt_user') == (
+        environment_helpers.introspect._scheme_dict(
+            sysconfig.get_paths('posix_user' if os.name == 'posix' else 'nt_user')
+        )
+    )
+
+
+def test_persistent_cache(mocker, monkeypatch, tmp_path, venv):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', str(tmp_path / 'cache'))
+
+    snapshot = environment_helpers.introspect.Introspectable(
+        venv.interpreter, cache=True
+    ).snapshot()
+    assert list(tmp_path.joinpath('cache', 'introspect').iterdir())
+
+    # new instances (eg. in other processes) use the cached data
+    mocker.patch.object(
+        environment_helpers.introspect.Introspectable, '_run_script', side_effect=AssertionError
+    )
+    introspectable = environment_helpers.introspect.Introspectable(venv.interpreter, cache=True)
+    assert introspectable.get_scheme() == snapshot.scheme
+    assert introspectable.get_version() == snapshot.version
+
+    # changing the environment invalidates the cache
+    with venv.base.joinpath('pyvenv.cfg').open('a') as f:
+        f.write('something = else\n')
+    introspectable = environment_helpers.introspect.Introspectable(venv.interpreter, cache=True)
+    with pytest.raises(AssertionError):
+        introspectable.get_scheme()
+
+
+def test_persistent_cache_corrupted(monkeypatch, tmp_path):
+    monkeypatch.setenv('ENVIRONMENT_HELPERS_CACHE_DIR', str(tmp_path))
+
+    snapshot = environment_helpers.introspect.Introspectable(sys.executable, cache=True).snapshot()
+    for path in tmp_path.joinpath('introspect').iterdir():
+        path.write_text('{')
+
+    introspectable = environment_helpers.introspect.Introspectable(sys.executable, cache=True)
+    assert introspectable.snapshot() == snapshot
+
+
+def test_get_introspectable(venv):
+    introspectable = environment_helpers.introspect.get_introspectable(venv.interpreter)
+
+    assert environment_helpers.introspect.get_introspectable(venv.interpreter) is introspectable
+    assert environment_helpers.introspect.get_introspectable(os.fspath(venv.interpreter)) is (
+        introspectable
+    )
+    assert venv.introspectable is introspectable
+    assert (
+        environment_helpers.introspect.get_introspectable(venv.interpreter, worker=True)
+        is not introspectable
+    )
+
+    # modifying the environment results in a new object
+    with venv.base.joinpath('pyvenv.cfg').open('a') as f:
+        f.write('something = else\n')
+    assert environment_helpers.introspect.get_introspectable(venv.interpreter) is not (
+        introspectable
+    )
+
+
+@pytest.mark.parametrize('worker', [False, True])
+def test_call_many(worker):
+    with environment_helpers.introspect.Introspectable(sys.executable, worker=worker) as obj:
+        results = obj.call_many(
+            [
+                ('operator.add', (1, 2), {}),
+                ('math.sqrt', (-1,), {}),
+                ('os.getpid', (), {}),
+                ('sysconfig.get_path', ('purelib',), {'vars': {'base': '/base'}}),
+                ('os.getpid', (), {}),
+            ]
+        )
+
+    assert results[0] == 3
+    assert isinstance(results[1], environment_helpers.introspect.CallError)
+    assert isinstance(results[1].__cause__, ValueError)
+    assert 'Traceback' in results[1].traceback
+    # all calls ran in the same process
+    assert results[2] == results[4]
+    assert results[3] == sysconfig.get_path('purelib', vars={'base': '/base'})
+
+
+def test_call_many_stream(worker_introspectable):
+    results = worker_introspectable.call_many(
+        [('operator.mul', (i, 2), {}) for i in range(1000)], stream=True
+    )
+
+    assert next(results) == 0
+    assert list(results) == [i * 2 for i in range(1, 1000)]
+
+
+def test_call_many_stream_stopped(worker_introspectable):
+    pid = worker_introspectable.call('os.getpid')
+
+    results = worker_introspectable.call_many(
+        [('os.getpid', (), {})] + [('time.sleep', (0.1,), {})] * 100, stream=True
+    )
+    assert next(results) == pid
+    results.close()
+
+    # the worker was restarted, as it still had replies to send
+    assert worker_introspectable.call('os.getpid') != pid
+
+
+def test_call_many_stream_other_call(worker_introspectable):
+    pid = worker_introspectable.call('os.getpid')
+    results = worker_introspectable.call_many([('os.getpid', (), {})] * 10, stream=True)
+    assert next(results) == pid
+
+    # the worker isn't held while the results are being iterated
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        future = executor.submit(worker_introspectable.call, 'os.getpid')
+        assert future.result(timeout=30) == pid
+
+    assert list(results) == [pid] * 9
+
+
+def test_call_many_large_batch():
+    introspectable = environment_helpers.introspect.Introspectable(sys.executable)
+    data = b'x' * 1024 * 1024
+
+    assert introspectable.call_many([('builtins.bytes', (data,), {})] * 64) == [data] * 64
+
+
+@pytest.mark.parametrize('worker', [False, True])
+def test_mmap_transport(worker):
+    with environment_helpers.introspect.Introspectable(
+        sys.executable, worker=worker, transport='mmap'
+    ) as obj:
+        data = os.urandom(1024 * 1024)
+
+        assert obj.call('builtins.bytes', data) == data
+        assert obj.call('builtins.bytearray', data) == bytearray(data)
+        result = obj.call('builtins.memoryview', data)
+        assert isinstance(result, memoryview)
+        assert result == data
+        # small objects go through the pipe
+        assert obj.call('operator.add', b'a', b'b') == b'ab'
+        assert obj.call_many([('builtins.len', (data,), {})] * 3) == [len(data)] * 3
+        with pytest.raises(environment_helpers.introspect.CallError):
+            obj.call('math.sqrt', -1)
+
+
+def test_mmap_transport_cleanup():
+    with environment_helpers.introspect.Introspectable(
+        sys.executable, worker=True, transport='mmap'
+    ) as obj:
+        obj.call('builtins.bytes', b'x' * 1024 * 1024)
+        mmap_dir = obj._worker._mmap_dir
+
+        assert os.listdir(mmap_dir) == []
+
+    assert not os.path.exists(mmap_dir)
+
+
+def test_mmap_transport_no_space(mocker):
+    mocker.patch('tempfile.mkstemp', side_effect=OSError(errno.ENOSPC, 'No space left on device'))
+    with environment_helpers.introspect.Introspectable(
+        sys.executable, worker=True, transport='mmap'
+    ) as obj:
+        data = memoryview(os.urandom(1024 * 1024))
+
+        # the buffers are sent through the pipe instead
+        assert obj.call('builtins.len', data) == len(data)
+        assert os.listdir(obj._worker._mmap_dir) == []
+
+
+def test_mmap_transport_no_shm(mocker, tmp_path):
+    mocker.patch.object(
+        environment_helpers.introspect, '_MMAP_DIR', os.fspath(tmp_path / 'missing')
+    )
+    with environment_helpers.introspect.Introspectable(
+        sys.executable, worker=True, transport='mmap'
+    ) as obj:
+        data = os.urandom(1024 * 1024)
+
+        assert obj.call('builtins.bytes', data) == data
+        assert os.path.dirname(obj._worker._mmap_dir) == tempfile.gettempdir()
+
+
+def test_virtual_environment_scheme(venv, mocker):
+    popen = mocker.spy(subprocess, 'Popen')
+
+    scheme = environment_helpers.introspect.get_virtual_environment_scheme(venv.base)
+
+    popen.assert_not_called()
+    assert scheme == environment_helpers.introspect.Introspectable(venv.interpreter).get_scheme()
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='POSIX scheme')
+def test_virtual_environment_scheme_other_version(tmp_path):
+    tmp_path.joinpath('pyvenv.cfg').write_text(
+        'home = /opt/python/bin\ninclude-system-site-packages = true\n'
+        'version_info = 3.8.10.final.0\n'
+    )
+
+    config = environment_helpers.introspect.read_virtual_environment_config(tmp_path)
+    scheme = environment_helpers.introspect.get_virtual_environment_scheme(tmp_path)
+
+    assert config.version == '3.8.10'
+    assert config.include_system_site_packages
+    assert config.base_prefix == pathlib.Path('/opt/python')
+    assert scheme['purelib'] == tmp_path / 'lib' / 'python3.8' / 'site-packages'
+    assert scheme['include'] == pathlib.Path('/opt/python/include/python3.8')
+    assert scheme['scripts'] == tmp_path / 'bin'
@@ -0,0 +1,112 @@
+import concurrent.futures
+import subprocess
+import sys
+
+import pytest
+
+import environment_helpers
+import environment_helpers.introspect
+import environment_helpers.trace
+
+
+@pytest.fixture
+def events():
+    events = []
+    with environment_helpers.trace.observe(events.append):
+        yield events
+
+
+def test_span(events):
+    with environment_helpers.trace.span('outer', value=1) as outer:
+        with environment_helpers.trace.span('inner'):
+            pass
+        outer['result'] = 2
+
+    assert [(event.kind, event.phase) for event in events] == [
+        ('start', 'outer'),
+        ('start', 'inner'),
+        ('stop', 'inner'),
+        ('stop', 'outer'),
+    ]
+    assert events[1].parent == events[0].id
+    assert events[0].parent is None
+    assert events[0].attributes == {'value': 1}
+    assert events[3].attributes == {'value': 1, 'result': 2}
+    assert events[3].duration >= events[2].duration >= 0
+
+
+def test_span_error(events):
+    with pytest.raises(ValueError, match='oops'), environment_helpers.trace.span('phase'):
+        raise ValueError('oops')
+
+    assert events[-1].attributes['error'] == "ValueError('oops')"
+
+
+def test_span_no_observers(mocker):
+    emit = mocker.patch('environment_helpers.trace._emit')
+
+    with environment_helpers.trace.span('phase'):
+        pass
+
+    emit.assert_not_called()
+
+
+def test_submit(events):
+    def inner(value):
+        with environment_helpers.trace.span('inner', value=value):
+            return value
+
+    with (
+        concurrent.futures.ThreadPoolExecutor(2) as executor,
+        environment_helpers.trace.span('outer'),
+    ):
+        futures = [environment_helpers.trace.submit(executor, inner, value) for value in range(2)]
+        assert [future.result() for future in futures] == [0, 1]
+
+    outer = events[0]
+    assert outer.phase == 'outer'
+    assert [event.parent for event in events if event.phase == 'inner'] == [outer.id] * 4
+
+
+def test_subprocess_events(venv, events):
+    with pytest.raises(subprocess.CalledProcessError):
+        venv.run_interpreter('-c', 'raise SystemExit(3)')
+
+    [stop] = [event for event in events if event.kind == 'stop' and event.phase == 'subprocess']
+    assert stop.attributes['command'][0] == str(venv.interpreter)
+    assert stop.attributes['returncode'] == 3
+
+
+def test_install_wheel_events(venv, events, make_wheel):
+    wheel = make_wheel('traced', {'traced.py': 'x = 1\n'})
+    venv.introspectable.snapshot()
+
+    venv.install_wheel(wheel)
+
+    [stop] = [event for event in events if event.kind == 'stop' and event.phase == 'install.wheel']
+    assert stop.attributes['files'] == 3
+    assert stop.attributes['bytes_written'] > len('x = 1\n')
+
+
+def test_install_from_path_events(venv, events, mocker, packages_path, example_wheel):
+    mocker.patch('environment_helpers.build.build_wheel', return_value=example_wheel)
+    mocker.patch('environment_helpers.Environment.install_wheel')
+
+    venv.install_from_path(packages_path / 'example', from_sdist=False)
+
+    [stop] = [event for event in events if event.kind == 'stop' and event.phase == 'install.path']
+    assert stop.attributes == {'path': str(packages_path / 'example'), 'from_sdist': False}
+
+
+def test_collector():
+    introspectable = environment_helpers.introspect.Introspectable(sys.executable)
+
+    with environment_helpers.trace.Collector() as collector:
+        introspectable.get_version()
+        introspectable.call('operator.add', 1, 2)
+        introspectable.call_many([('operator.add', (1, 2), {})] * 2)
+
+    assert collector.phases['introspect.script'].count == 1
+    assert collector.phases['introspect.call'].count == 2
+    assert collector.phases['introspect.call'].total > 0
+    assert 'introspect.call' in collector.summary()